@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import json
+import os
+
+import flask
+import pandas as pd
+import plotly.io as pio
+
+import geometry
+import ranking
+from memo import Memo
+
+try:
+    import brotli
+except ImportError:
+    # gzip only
+    brotli = None
+
+# compression of every json/text response and read-only figure endpoints that browsers and proxies can cache
+#   GET /api/map/<year>                          the choropleth figure of a year
+#   GET /api/bars/<family>/<year>?states=A,B     a data by figure, family is a key of families.Registry
+#   GET /api/top/<kind>/<year>?metric=change&k=10&order=desc
+#                                                top k states or categories of a family, see ranking.py
+#   GET /geometry/india_states.geojson           the simplified state boundaries the map figures point to
+# ETags are derived from the dataset version, so a new dataset invalidates every cached copy
+
+# responses smaller than this are sent as they are
+MIN_SIZE = 500
+COMPRESSIBLE = ('application/json', 'text/', 'application/javascript')
+MAX_AGE = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 300))
+# responses cached this long (seconds) by the browser are static files, their compressed bodies are kept
+LONG_LIVED = 86400
+static_bodies = Memo(maxsize=64)
+
+
+def dataset_version(*frames):
+    # short hash of the contents of the data frames, changes whenever any value does
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def encoding(accept_encoding):
+    # best encoding the client accepts, None for identity
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, method):
+    if method == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def compress_response(response):
+    if response.direct_passthrough or response.status_code < 200 or response.status_code >= 300 or \
+            'Content-Encoding' in response.headers or not response.mimetype.startswith(COMPRESSIBLE):
+        return response
+
+    method = encoding(flask.request.headers.get('Accept-Encoding', ''))
+    body = response.get_data()
+    if method is None or len(body) < MIN_SIZE:
+        return response
+
+    # dash's component bundles (up to a few MB) come with an ETag or a fingerprinted url and a long max-age, their
+    # content only changes with the key, so they are compressed once per process
+    etag = response.get_etag()[0]
+    if etag is not None or (response.cache_control.max_age or 0) >= LONG_LIVED:
+        response.set_data(static_bodies.get((flask.request.full_path, etag, method), lambda: compress(body, method)))
+    else:
+        response.set_data(compress(body, method))
+    response.headers['Content-Encoding'] = method
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def make_etag(version, *parts):
+    return version + '-' + hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
+
+
+def send(bodies, etag, build):
+    # json of build() with caching headers, 304 when the client has it already
+    # bodies (a Memo) keeps encoded bodies by etag and encoding, so repeated requests skip serializing and compressing
+    headers = {'ETag': '"' + etag + '"',
+               'Cache-Control': 'public, max-age={}'.format(MAX_AGE),
+               'Vary': 'Accept-Encoding'}
+    if etag in flask.request.if_none_match:
+        return flask.Response(status=304, headers=headers)
+
+    method = encoding(flask.request.headers.get('Accept-Encoding', ''))
+
+    def encode():
+        body = pio.to_json(build(), validate=False).encode()
+        if method is None or len(body) < MIN_SIZE:
+            return body, None
+        return compress(body, method), method
+
+    body, used = bodies.get((etag, method), encode)
+    response = flask.Response(body, mimetype='application/json', headers=headers)
+    if used is not None:
+        response.headers['Content-Encoding'] = used
+    return response
+
+
+def install(server, version, map_figure, bars_figure, families, years, states):
+    # version() is the current dataset version, map_figure(year) and bars_figure(family, states, year) return
+    # figure dicts, years() and states() are the years and state names the endpoints accept
+    bodies = Memo(maxsize=256)
+
+    def figure_etag(*parts):
+        return make_etag(version(), *parts)
+
+    @server.route('/api/map/<int:year>')
+    def api_map(year):
+        if year not in years():
+            flask.abort(404)
+        return send(bodies, figure_etag('map', year), lambda: map_figure(year))
+
+    @server.route('/api/bars/<family>/<int:year>')
+    def api_bars(family, year):
+        if family not in families or year not in years():
+            flask.abort(404)
+        known = states()
+        selected = sorted({state for state in flask.request.args.get('states', '').split(',') if state})
+        if not selected or any(state not in known for state in selected):
+            flask.abort(404)
+        return send(bodies, figure_etag('bars', family, year, tuple(selected)),
+                    lambda: bars_figure(family, selected, year))
+
+
+def install_compression(server):
+    # flask runs after_request hooks in reverse order, installed before instrumentation.install the compression
+    # runs after it, so /metrics records the size and serialize time of the uncompressed response
+    server.after_request(compress_response)
+
+
+def install_geometry(server, collection):
+    # plotly.js fetches the boundaries once per page and keeps them, so slider moves only carry the values
+    bodies = Memo(maxsize=4)
+    etag = make_etag(hashlib.sha1(json.dumps(collection, sort_keys=True).encode()).hexdigest()[:16], 'geometry')
+
+    @server.route(geometry.GEOJSON_ROUTE)
+    def api_geometry():
+        return send(bodies, etag, lambda: collection)
+
+    return geometry.GEOJSON_ROUTE
+
+
+def install_rankings(server, version, rankings):
+    # rankings() is the current ranking.Rankings
+    bodies = Memo(maxsize=256)
+
+    @server.route('/api/top/<kind>/<int:year>')
+    def api_top(kind, year):
+        index = rankings()
+        metric = flask.request.args.get('metric', 'count')
+        order = flask.request.args.get('order', 'desc')
+        try:
+            k = int(flask.request.args.get('k', index.k))
+        except ValueError:
+            flask.abort(400)
+        if kind not in index.entities or year not in index.year_ids or metric not in ranking.METRICS or \
+                order not in ('desc', 'asc') or not 0 < k <= 1000:
+            flask.abort(404)
+
+        def build():
+            return {'kind': kind, 'metric': metric, 'year': year, 'order': order,
+                    'top': [{'name': name, 'value': value}
+                            for name, value in index.top(kind, metric, year, k, order == 'desc')]}
+
+        return send(bodies, make_etag(version(), 'top', kind, year, metric, order, k), build)
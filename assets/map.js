@@ -0,0 +1,21 @@
+// swaps the year shown on the map in the browser, the server is not involved after the first load
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    map: {
+        update_year: function (year, figure, years) {
+            var values = years[String(year)];
+            if (!figure || !values) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+
+            var trace = Object.assign({}, figure.data[0], {
+                locations: values.locations,
+                z: values.z,
+                customdata: values.locations.map(function (state, i) {
+                    return [state, values.z[i]];
+                })
+            });
+
+            return ['Year: ' + year, Object.assign({}, figure, {data: [trace]})];
+        }
+    }
+});
@@ -0,0 +1,8 @@
+// a random id per browser tab, sent with the heavy callbacks so the server can drop requests it replaced
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    session: {
+        client_id: function () {
+            return Math.random().toString(36).slice(2) + Date.now().toString(36);
+        }
+    }
+});
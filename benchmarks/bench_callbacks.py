@@ -0,0 +1,143 @@
+# latency and allocations of every dashboard callback, called directly without a browser
+# run from the repo root: python benchmarks/bench_callbacks.py [--baseline PATH [--save]] [--warm]
+#   --baseline  compare the run with the results saved in PATH and exit with 1 when a p95 regressed
+#   --save      store the results in the --baseline PATH instead, baselines are per machine and not committed
+#   --warm      keep the callback memo, by default it is disabled so every call does the full work
+# to run against synthetic.py output: DASHBOARD_WIDE_CSV=wide.csv DASHBOARD_LONG_CSV=long.parquet python ...
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAYLOADS = os.path.join(ROOT, 'benchmarks', 'payloads.json')
+
+import dashboard  # noqa: E402
+from memo import Memo  # noqa: E402
+
+
+def unwrap(callback):
+    # dash keeps the undecorated function on __wrapped__
+    return getattr(callback, '__wrapped__', callback)
+
+
+def click(state):
+    return {'points': [{'curveNumber': 0, 'pointNumber': 0, 'pointIndex': 0, 'location': state}]}
+
+
+def lasso(states):
+    return {'points': [{'curveNumber': 0, 'pointNumber': i, 'pointIndex': i, 'location': state}
+                       for i, state in enumerate(states)]}
+
+
+def cases():
+    # callback name -> list of argument tuples
+    # the aggregate 'Total (...)' rows are not states on the map
+    states = [state for state in dashboard.datasets.current.cube.states if not state.startswith('Total')]
+    years = dashboard.datasets.current.cube.years
+    families = [family.key for family in dashboard.datasets.current.cube.families.charted()]
+    kinds = ['states'] + families
+    single = dashboard.select_states(click(states[0]), None)
+    every = dashboard.select_states(None, lasso(states))
+
+    selections = [(None, click(states[0])), (None, lasso(states)), (None, None)]
+    if os.path.exists(PAYLOADS):
+        with open(PAYLOADS) as f:
+            recorded = json.load(f)
+        selections += [(payload.get('clickData'), payload.get('selectedData')) for payload in recorded]
+
+    return {
+        'update_graph': [(year,) for year in years] + [(years[-1], ['range'], [start, years[-1]]) for start in years],
+        'year_sliders': [(None,), ([],), (['range'],)],
+        'select_states': [(clicked, selected) for clicked, selected in selections],
+        'display_selected_state': [(single,), (every,), (None,)],
+        'age_options': [(type_code,) for type_code in range(4)],
+        # nothing on screen yet, so the full figure is built and sent
+        'trends_fig': [(ids, type_code, gender, age, ['show'], None) for ids, type_code, gender, age
+                       in itertools.product([single, every], range(4), range(3), range(5))],
+        'data_by': [(figure_select, year, ids, [], None, None) for figure_select, year, ids
+                    in itertools.product(families, years, [single, every])] +
+                   [(figure_select, years[-1], ids, ['range'], [start, years[-1]], None) for figure_select, start, ids
+                    in itertools.product(families, years, [single, every])],
+        'district_drilldown': [(ids, year, [], None) for ids, year in itertools.product([single, every, None], years)] +
+                              [(single, years[-1], ['range'], [start, years[-1]]) for start in years],
+        'leaderboard': [(kind, metric, order, year, [], None) for kind, metric, order, year
+                        in itertools.product(kinds, dashboard.METRIC_TITLES, ['desc', 'asc'], years)] +
+                       [(kind, metric, 'desc', years[-1], ['range'], [start, years[-1]]) for kind, metric, start
+                        in itertools.product(kinds, dashboard.METRIC_TITLES, years)],
+    }
+
+
+def measure(callback, arguments, rounds):
+    times = []
+    for _ in range(rounds):
+        for args in arguments:
+            start = time.perf_counter()
+            callback(*args)
+            times.append(time.perf_counter() - start)
+
+    # allocations in a separate pass, tracing slows every call down
+    peaks = []
+    tracemalloc.start()
+    for args in arguments:
+        tracemalloc.reset_peak()
+        callback(*args)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(np.array(times) * 1000, [50, 95, 99])
+    return {'calls': len(times), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'peak_alloc_kb': max(peaks) / 1024}
+
+
+def compare(results, baselines, tolerance, floor_ms=1.0):
+    # callbacks faster than floor_ms are timer noise, they are not compared
+    regressed = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline and result['p95_ms'] > max(baseline['p95_ms'] * tolerance, floor_ms):
+            regressed.append('{}: p95 {:.2f} ms, baseline {:.2f} ms'.format(name, result['p95_ms'], baseline['p95_ms']))
+    return regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--warm', action='store_true')
+    parser.add_argument('--baseline', help='json file of saved results')
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed p95 slowdown over the baseline')
+    args = parser.parse_args()
+    if args.save and args.baseline is None:
+        parser.error('--save needs --baseline PATH')
+
+    if not args.warm:
+        dashboard.memo = Memo(maxsize=0)
+
+    results = {}
+    for name, arguments in cases().items():
+        results[name] = measure(unwrap(getattr(dashboard, name)), arguments, args.rounds)
+        result = results[name]
+        print('{:<24} {:>6} calls  p50 {:>8.2f} ms  p95 {:>8.2f} ms  p99 {:>8.2f} ms  peak {:>8.0f} KB'.format(
+            name, result['calls'], result['p50_ms'], result['p95_ms'], result['p99_ms'], result['peak_alloc_kb']))
+
+    if args.baseline is None:
+        sys.exit()
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('saved ' + args.baseline)
+    else:
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+        for line in regressed:
+            print('regression ' + line)
+        if regressed:
+            sys.exit(1)
@@ -0,0 +1,46 @@
+# compares the precomputed correlation engine with one DataFrame.corr per feature as feature_matrix did it
+# run from the repo root: python benchmarks/bench_correlation.py
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_store  # noqa: E402
+from correlation import Correlations  # noqa: E402
+from cube import Cube  # noqa: E402
+
+
+def corr_loop(wide, states, year, features):
+    # the original: a slice of the rows, then a 2x2 correlation matrix per feature
+    if len(states) == 1:
+        rows = wide[wide['State'] == states[0]]
+    else:
+        rows = wide[(wide['Year'] == year) & wide['State'].isin(states)]
+    return np.array([rows[['Total', feature]].corr(method='pearson').iloc[0, 1] for feature in features])
+
+
+if __name__ == '__main__':
+    wide = data_store.load_wide()
+    start = timeit.default_timer()
+    correlations = Correlations(Cube(wide))
+    print('engine built in {:.1f} ms'.format((timeit.default_timer() - start) * 1000))
+
+    states = [state for state in correlations.cube.states if not state.startswith('Total')]
+    selections = {'one state': states[:1], 'ten states': states[:10], 'every state': states}
+    for name, selection in selections.items():
+        expected = corr_loop(wide, selection, 2012, correlations.features)
+        if len(selection) == 1:
+            got = correlations.state(selection[0])
+        else:
+            got = correlations.states(selection, 2012)
+        assert np.allclose(expected, got, equal_nan=True), name
+
+        # one feature per call, like the callback
+        feature = correlations.features[0]
+        loop = min(timeit.repeat(lambda: corr_loop(wide, selection, 2012, [feature]), number=20, repeat=3)) / 20
+        engine = min(timeit.repeat(lambda: correlations.get(selection, 2012, feature), number=1000, repeat=3)) / 1000
+        print('{:<12} loop {:8.3f} ms   engine {:8.4f} ms   {:>8.0f}x'.format(
+            name, loop * 1000, engine * 1000, loop / engine))
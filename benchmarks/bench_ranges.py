@@ -0,0 +1,44 @@
+# latency of year range sums as the range grows: a scan of the wide rows against the cube's prefix sums
+# run from the repo root: python benchmarks/bench_ranges.py --years 100
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_store  # noqa: E402
+import synthetic  # noqa: E402
+from cube import Cube  # noqa: E402
+
+
+def scan(df, states, start, end, columns):
+    rows = df[(df['Year'] >= start) & (df['Year'] <= end) & df['State'].isin(states)]
+    return rows[columns].sum().to_numpy()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=100, help='synthetic years, 0 for the real data')
+    args = parser.parse_args()
+
+    df = data_store.load_wide()
+    if args.years:
+        df = pd.concat(synthetic.synthetic_wide(df, range(2001, 2001 + args.years), districts=1), ignore_index=True)
+    cube = Cube(df)
+    print('{} rows, {} states x {} years'.format(len(df), len(cube.states), len(cube.years)))
+
+    states = [state for state in cube.states if not state.startswith('Total')][:10]
+    names = cube.families['cause'].columns
+    first = cube.years[0]
+    for span in sorted({1, 5, 10, 50, len(cube.years)}):
+        if span > len(cube.years):
+            continue
+        end = first + span - 1
+        assert np.array_equal(scan(df, states, first, end, names), cube.query_range('cause', states, first, end)[1])
+        rows = min(timeit.repeat(lambda: scan(df, states, first, end, names), number=5, repeat=3)) / 5
+        prefix = min(timeit.repeat(lambda: cube.query_range('cause', states, first, end), number=200, repeat=3)) / 200
+        print('{:>4} years  scan {:8.2f} ms   prefix sums {:7.3f} ms'.format(span, rows * 1000, prefix * 1000))
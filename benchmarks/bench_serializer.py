@@ -0,0 +1,47 @@
+# bytes and encode time of the map, trends and data-by figures with plain json lists vs base64 typed arrays,
+# and with the json vs orjson engine
+# run from the repo root: python benchmarks/bench_serializer.py
+import os
+import sys
+import timeit
+
+import plotly.io as pio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dashboard  # noqa: E402
+import serializer  # noqa: E402
+
+
+def figures():
+    dataset = dashboard.datasets.current
+    states = dataset.cube.states
+    return {
+        'update_graph': serializer.plain(dashboard.map_figure(dataset, 2012, 2012).to_dict()),
+        'trends_fig': serializer.plain(dashboard.trends_figure(dataset, states, 'Causes', None, '30-44', True)),
+        'data_by': serializer.plain(dashboard.data_by_figure(dataset, 'cause', states, 2012, 2012)),
+    }
+
+
+def encode(fig, engine, number=20):
+    seconds = min(timeit.repeat(lambda: pio.json.to_json_plotly(fig, engine=engine), number=number, repeat=3)) / number
+    return len(pio.json.to_json_plotly(fig, engine=engine).encode()), seconds
+
+
+if __name__ == '__main__':
+    engines = ['json']
+    try:
+        import orjson  # noqa: F401
+        engines.append('orjson')
+    except ImportError:
+        print('orjson is not installed, only the json engine is measured')
+
+    for name, fig in figures().items():
+        # the geometry is the same for every variant, leave it out so the arrays are what is compared
+        for trace in fig['data']:
+            trace.pop('geojson', None)
+        for arrays, variant in (('lists', fig), ('typed', serializer.compact(fig))):
+            for engine in engines:
+                size, seconds = encode(variant, engine)
+                print('{:<14} {:<6} {:<7} {:>8} bytes  {:>7.3f} ms'.format(name, arrays, engine, size, seconds * 1000))
@@ -0,0 +1,47 @@
+# startup time and resident memory of loading the datasets from csv and from the columnar store
+# run from the repo root after `python data_store.py convert`: python benchmarks/bench_store.py
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_store
+
+# each measurement runs in a fresh interpreter so memory from one load does not hide the next
+PROBE = '''
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+import data_store
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {source!r} == 'csv':
+    frames = [pd.read_csv(data_store.WIDE_CSV), pd.read_csv(data_store.LONG_CSV)]
+else:
+    frames = [data_store.load_wide(), data_store.load_long()]
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'rss_kb': after - before,
+                  'frame_kb': int(sum(f.memory_usage(deep=True).sum() for f in frames)) // 1024}}))
+'''
+
+
+def measure(source, runs=3):
+    results = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', PROBE.format(root=ROOT, source=source)])
+        results.append(json.loads(output))
+    return min(results, key=lambda result: result['seconds'])
+
+
+if __name__ == '__main__':
+    if not os.path.exists(data_store.store_path(data_store.WIDE_CSV)):
+        sys.exit('no store found, run `python data_store.py convert` first')
+
+    for source in ('csv', 'store'):
+        result = measure(source)
+        print('{:<6} {:>8.1f} ms  rss +{:>7} KB  frames {:>7} KB'.format(
+            source, result['seconds'] * 1000, result['rss_kb'], result['frame_kb']))
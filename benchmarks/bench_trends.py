@@ -0,0 +1,59 @@
+# compares the grouped trends engine with the old Type x Year loop from trends_fig
+# run from the repo root: python benchmarks/bench_trends.py
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trends import YEARS, trend_series
+
+
+def trend_series_loop(refined_data, years=YEARS):
+    # the original nested loop from trends_fig
+    types = refined_data['Type'].unique()
+    rows = []
+    for type in types:
+        y = []
+        for year in years:
+            temp = refined_data[refined_data['Type'] == type]
+            y.append(temp[temp['Year'] == year]['Total'].sum())
+        rows.append(y)
+    return list(types), np.array(rows)
+
+
+def synthetic_rows(n_rows, n_types=25, seed=0):
+    # filtered long-format rows shaped like one trends_fig selection
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Type': np.array(['Type ' + str(i) for i in range(n_types)])[rng.integers(0, n_types, n_rows)],
+                         'Year': rng.choice(YEARS, n_rows),
+                         'Total': rng.poisson(20, n_rows)})
+
+
+def selection_from_csv(path='data.csv'):
+    # the rows trends_fig sees for every state, causes, both genders, 30-44
+    data = pd.read_csv(path)
+    return data[(data['Type_code'] == 'Causes') & (data['Age_group'] == '30-44')]
+
+
+def bench(name, rows, number=5, repeat=3):
+    types, fast = trend_series(rows)
+    loop_types, slow = trend_series_loop(rows)
+    assert types == loop_types and np.array_equal(fast, slow)
+
+    loop = min(timeit.repeat(lambda: trend_series_loop(rows), number=number, repeat=repeat)) / number
+    grouped = min(timeit.repeat(lambda: trend_series(rows), number=number, repeat=repeat)) / number
+    print('{:<12} {:>9} rows  loop {:>9.2f} ms  grouped {:>7.2f} ms  x{:.1f}'.format(
+        name, len(rows), loop * 1000, grouped * 1000, loop / grouped))
+
+
+if __name__ == '__main__':
+    if os.path.exists('data.csv'):
+        base = selection_from_csv()
+    else:
+        base = synthetic_rows(2000)
+    bench('data.csv', base)
+    bench('100x', synthetic_rows(len(base) * 100, n_types=base['Type'].nunique()), number=1, repeat=1)
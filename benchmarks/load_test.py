@@ -0,0 +1,125 @@
+# requests per second of the data_by and trends callbacks under wsgi.py with 1, 2, 4... workers
+# run from the repo root: python benchmarks/load_test.py --workers 1 2 4 --clients 16 --seconds 10
+# pass --url to load an already running server instead of starting one per worker count
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from multiprocessing import Pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+YEARS = list(range(2001, 2013))
+FAMILIES = ['profession', 'cause', 'education', 'social', 'means', 'gender']
+
+
+def data_by_payload(rng, states, client_id):
+    selected = sorted(rng.sample(states, rng.randint(1, len(states))))
+    return {'output': '..data_by_figure.figure...data_by_error.hidden...data_by_shown.data..',
+            'outputs': [{'id': 'data_by_figure', 'property': 'figure'},
+                        {'id': 'data_by_error', 'property': 'hidden'},
+                        {'id': 'data_by_shown', 'property': 'data'}],
+            'inputs': [{'id': 'data_by_select', 'property': 'value',
+                        'value': rng.choice(FAMILIES)},
+                       {'id': 'select_year', 'property': 'value', 'value': rng.choice(YEARS)},
+                       {'id': 'selected_states', 'property': 'data', 'value': selected},
+                       {'id': 'year_mode', 'property': 'value', 'value': []},
+                       {'id': 'select_years', 'property': 'value', 'value': [2001, 2012]}],
+            'changedPropIds': ['selected_states.data'],
+            'state': [{'id': 'data_by_shown', 'property': 'data', 'value': None},
+                      {'id': 'client_id', 'property': 'data', 'value': client_id}]}
+
+
+def trends_payload(rng, states, client_id):
+    selected = sorted(rng.sample(states, rng.randint(1, len(states))))
+    return {'output': '..trends_figure.figure...type_code_error.hidden...trends_shown.data..',
+            'outputs': [{'id': 'trends_figure', 'property': 'figure'},
+                        {'id': 'type_code_error', 'property': 'hidden'},
+                        {'id': 'trends_shown', 'property': 'data'}],
+            'inputs': [{'id': 'selected_states', 'property': 'data', 'value': selected},
+                       {'id': 'type_code_select', 'property': 'value', 'value': rng.randint(0, 3)},
+                       {'id': 'gender_select', 'property': 'value', 'value': rng.randint(0, 2)},
+                       {'id': 'age_select', 'property': 'value', 'value': rng.randint(0, 4)},
+                       {'id': 'trends_projection', 'property': 'value', 'value': ['show']}],
+            'changedPropIds': ['selected_states.data'],
+            'state': [{'id': 'trends_shown', 'property': 'data', 'value': None},
+                      {'id': 'client_id', 'property': 'data', 'value': client_id}]}
+
+
+def client(args):
+    url, seconds, states, seed = args
+    rng = random.Random(seed)
+    endpoint = url + '/_dash-update-component'
+    done = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        payload = rng.choice([data_by_payload, trends_payload])(rng, states, 'load-test-{}'.format(seed))
+        request = urllib.request.Request(endpoint, data=json.dumps(payload).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            done += 1
+        except urllib.error.URLError:
+            errors += 1
+    return done, errors
+
+
+def run_load(url, clients, seconds, states):
+    with Pool(clients) as pool:
+        results = pool.map(client, [(url, seconds, states, seed) for seed in range(clients)])
+    done = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    return done / seconds, errors
+
+
+def wait_until_up(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/_dash-layout'):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    raise RuntimeError('server at ' + url + ' did not start')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--url', help='load this server instead of starting wsgi.py')
+    args = parser.parse_args()
+
+    # selections are sampled from the states of the local data, the aggregate 'Total (...)' rows are not on the map
+    sys.path.insert(0, ROOT)
+    import data_store
+    states = sorted(state for state in data_store.load_wide()['State'].astype(str).unique()
+                    if not state.startswith('Total'))
+
+    if args.url:
+        rps, errors = run_load(args.url, args.clients, args.seconds, states)
+        print('{:>8.1f} req/s  {} errors'.format(rps, errors))
+        sys.exit()
+
+    url = 'http://127.0.0.1:{}'.format(args.port)
+    for workers in args.workers:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'wsgi.py'), '--host', '127.0.0.1',
+                                   '--port', str(args.port), '--workers', str(workers),
+                                   '--threads', str(args.threads)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(url)
+            rps, errors = run_load(url, args.clients, args.seconds, states)
+            print('{:>2} workers x {} threads  {:>8.1f} req/s  {} errors'.format(workers, args.threads, rps, errors))
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,57 @@
+import numpy as np
+
+# families whose columns the feature description heatmap correlates with Total, keys of families.Registry
+RISK_FAMILIES = ['profession', 'education', 'social']
+
+
+def pearson(n, sx, sy, sxx, syy, sxy):
+    # correlation from sufficient statistics, nan where either side is constant like DataFrame.corr
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    return np.clip(r, -1.0, 1.0)
+
+
+class Correlations:
+    # Pearson correlation of Total with every feature column, from the state x year sums of a Cube
+    # over the years of one state: precomputed for every state
+    # over a set of states in one year: sums of per state products, one small fancy-indexed sum per query
+
+    def __init__(self, cube, families=RISK_FAMILIES):
+        self.cube = cube
+        self.features = []
+        positions = []
+        for key in families:
+            family = cube.families[key]
+            self.features += family.columns
+            positions += range(family.block.start, family.block.stop)
+        self.feature_ids = {feature: i for i, feature in enumerate(self.features)}
+
+        x = cube.values[:, :, positions].astype(np.float64)
+        y = cube.values[:, :, cube.families['total'].block.start].astype(np.float64)[:, :, np.newaxis]
+        # state x year x feature terms of the sums
+        self.terms = np.stack([x, np.broadcast_to(y, x.shape), x * x, np.broadcast_to(y * y, x.shape), x * y])
+
+        sx, sy, sxx, syy, sxy = self.terms.sum(axis=2)
+        self.by_state = pearson(len(cube.years), sx, sy, sxx, syy, sxy)
+
+    def state(self, state):
+        # correlations over the years of one state, one value per feature
+        state_id = self.cube.state_ids.get(state)
+        if state_id is None:
+            return np.full(len(self.features), np.nan)
+        return self.by_state[state_id]
+
+    def states(self, states, year):
+        # correlations over the given states in one year
+        positions = self.cube.state_positions(states)
+        year_id = self.cube.year_ids.get(year)
+        if year_id is None or not positions:
+            return np.full(len(self.features), np.nan)
+        sx, sy, sxx, syy, sxy = self.terms[:, positions, year_id].sum(axis=1)
+        return pearson(len(positions), sx, sy, sxx, syy, sxy)
+
+    def get(self, states, year, feature):
+        # one state: over its years, several states: across them in the given year
+        if len(states) == 1:
+            return self.state(states[0])[self.feature_ids[feature]]
+        return self.states(states, year)[self.feature_ids[feature]]
@@ -0,0 +1,78 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from families import Registry
+
+
+class Cube:
+    # state x year x category counts summed once at load
+    # a query for any set of states and a year, or a range of years, is one fancy-indexed sum over the contiguous
+    # column block of a family
+
+    def __init__(self, df):
+        self.states = sorted(df['State'].unique())
+        self.years = sorted(int(year) for year in df['Year'].unique())
+        self.state_ids = {state: i for i, state in enumerate(self.states)}
+        self.year_ids = {year: i for i, year in enumerate(self.years)}
+
+        # family key -> labels and block of columns in values
+        self.families = Registry(df.columns)
+        columns = self.families.columns
+        self.columns = columns
+
+        self.values = np.zeros((len(self.states), len(self.years), len(columns)), dtype=np.int64)
+        state_index = df['State'].map(self.state_ids).to_numpy()
+        year_index = df['Year'].astype(int).map(self.year_ids).to_numpy()
+        # np.add.at so duplicated state/year rows add up like the old column sums did
+        np.add.at(self.values, (state_index, year_index), df[columns].to_numpy(dtype=np.int64))
+        # rows per state and year, a state without rows in the chosen years is left off the map
+        self.rows = np.zeros((len(self.states), len(self.years)), dtype=np.int64)
+        np.add.at(self.rows, (state_index, year_index), 1)
+
+        # prefix sums over the years: the sum over years i..j-1 is cumulative[:, j] - cumulative[:, i]
+        self.cumulative = np.zeros((len(self.states), len(self.years) + 1, len(columns)), dtype=np.int64)
+        np.cumsum(self.values, axis=1, out=self.cumulative[:, 1:])
+        self.cumulative_rows = np.zeros((len(self.states), len(self.years) + 1), dtype=np.int64)
+        np.cumsum(self.rows, axis=1, out=self.cumulative_rows[:, 1:])
+
+    def state_positions(self, states):
+        return [self.state_ids[state] for state in states if state in self.state_ids]
+
+    def year_span(self, start, end):
+        # (i, j) such that years[i:j] are the data years in [start, end], None when there are none
+        i = bisect_left(self.years, start)
+        j = bisect_right(self.years, end)
+        return (i, j) if i < j else None
+
+    def query(self, family, states, year):
+        # summed counts of every category in family for the states in the given year
+        family = self.families[family]
+        year_id = self.year_ids.get(year)
+        positions = self.state_positions(states)
+        if year_id is None or not positions:
+            return family.labels, np.zeros(len(family.columns), dtype=np.int64)
+        return family.labels, self.values[positions, year_id, family.block].sum(axis=0)
+
+    def query_range(self, family, states, start, end):
+        # summed counts of every category in family for the states over the years [start, end], the same two
+        # subtractions however many years the range spans
+        family = self.families[family]
+        span = self.year_span(start, end)
+        positions = self.state_positions(states)
+        if span is None or not positions:
+            return family.labels, np.zeros(len(family.columns), dtype=np.int64)
+        i, j = span
+        sums = self.cumulative[positions, j, family.block] - self.cumulative[positions, i, family.block]
+        return family.labels, sums.sum(axis=0)
+
+    def state_totals(self, start, end):
+        # states with rows in [start, end] and their Total over those years, for the map
+        span = self.year_span(start, end)
+        if span is None:
+            return [], np.zeros(0, dtype=np.int64)
+        i, j = span
+        total = self.families['total'].block.start
+        present = (self.cumulative_rows[:, j] - self.cumulative_rows[:, i]) > 0
+        totals = self.cumulative[:, j, total] - self.cumulative[:, i, total]
+        return [state for state, shown in zip(self.states, present) if shown], totals[present]
@@ -1,18 +1,126 @@
-import pandas as pd
+import os
+
 import plotly.express as px
 import plotly.graph_objects as go
 import dash
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_html_components as html
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
+
+import api
+import geometry
+import instrumentation
+import jobs
+import serializer
+from dataset import RELOAD, DatasetManager
+from districts import DISTRICT_KEY, DistrictTiles
+from figure_cache import FigureCache
+from instrumentation import stage
+from jobs import JobQueue, Superseded, checkpoint
+from memo import Memo, selection_key
+from patches import figure_update
+from selection import from_store, selected_locations, to_store
+from serializer import figure_dict
+from trends import YEARS, trend_series
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# flask app for wsgi servers, see wsgi.py
+server = app.server
+
+# gzip/brotli for every response, see api.install_compression
+api.install_compression(server)
+
+# with DASHBOARD_METRICS=1 every callback is timed, see /metrics and the Server-Timing response headers
+if os.environ.get('DASHBOARD_METRICS') == '1':
+    instrumentation.install(app)
+
+# with DASHBOARD_FAST_JSON=1 responses are serialized with orjson, DASHBOARD_TYPED_ARRAYS=1 is checked against the
+# plotly.js dash serves, see serializer.py
+serializer.install()
+
+# district geometry for the drill-down map, loaded per state on first click
+district_tiles = DistrictTiles()
+# callback results keyed on the normalized selection and the dataset version, shared by every user
+memo = Memo(maxsize=int(os.environ.get('DASHBOARD_MEMO_SIZE', 512)), directory=os.environ.get('DASHBOARD_MEMO_DIR'))
+# with DASHBOARD_ASYNC=1 trends and data by figures are built on a worker pool, repeated requests share one job
+# and a newer selection from the same browser cancels the one it replaces
+job_queue = JobQueue(workers=int(os.environ.get('DASHBOARD_ASYNC_WORKERS', 4)), enabled=jobs.ASYNC)
+# state boundaries are loaded and simplified once and served on their own url, which every map figure points to
+geo = geometry.load_or_url()
+geojson_url = geometry.GEOJSON_URL if geo is None else api.install_geometry(server, geo.geojson())
+
+# with DASHBOARD_CLIENTSIDE_MAP=1 every year is preloaded and the slider never calls the server
+CLIENTSIDE_MAP = os.environ.get('DASHBOARD_CLIENTSIDE_MAP') == '1'
+
+
+def map_figure(dataset, start, end):
+    # one row per state with its Total over the years [start, end], from the prefix sums of the cube
+    states, totals = dataset.cube.state_totals(start, end)
+
+    # Plotly Express
+    fig = px.choropleth(
+        data_frame={'State': states, 'Total': totals.tolist()},
+        geojson=geojson_url,
+        featureidkey='properties.' + geometry.FEATURE_KEY,
+        locations='State',
+        color='Total',  # z
+        hover_data=['State', 'Total'],
+        color_continuous_scale='PuRd',
+        range_color=[0, 20000 * (end - start + 1)],
+        labels={'Total': 'Total Suicides'},
+    )
+
+    if geo is None:
+        fig.update_geos(fitbounds="locations", visible=False)
+    else:
+        # bounds are known up front so the browser does not have to fit them per figure
+        lon_min, lat_min, lon_max, lat_max = geo.extent()
+        fig.update_geos(visible=False, lonaxis_range=[lon_min, lon_max], lataxis_range=[lat_min, lat_max])
+
+    return fig
+
+
+def prepare(dataset):
+    # the map for each year is built once per dataset version and served from memory, built before the version
+    # is swapped in so a reload does not slow down the first requests after it
+    dataset.map_cache = FigureCache(lambda year: map_figure(dataset, year, year), encode=figure_dict)
+    dataset.map_cache.warm(dataset.cube.years)
+
+
+# processed_suicide_data.csv and data.csv, read from the typed columnar store when `python data_store.py convert`
+# has been run, and reloaded in the background when the files change
+datasets = DatasetManager(prepare=prepare)
+
+
+@datasets.on_swap
+def drop_caches(new, old):
+    # entries of the old version can no longer be hit, their keys hold its version
+    memo.clear()
+    district_tiles.cache.clear()
+
+
+if RELOAD:
+    # the watcher thread is started by the first request of each process, see DatasetManager.start
+    server.before_request(datasets.start)
+
+# hit rates and counters on /metrics
+instrumentation.export('memo', lambda: memo.stats())
+instrumentation.export('map_cache', lambda: datasets.current.map_cache.stats())
+instrumentation.export('jobs', job_queue.stats)
+instrumentation.export('dataset', datasets.stats)
+
+
+def map_years(dataset):
+    # Total per state for every year, shipped to the browser once in clientside mode
+    years = {}
+    totals = dataset.df.groupby(['Year', 'State'], observed=True)['Total'].sum()
+    for year, dff in totals.groupby(level='Year'):
+        dff = dff.droplevel('Year')
+        years[str(year)] = {'locations': dff.index.astype(str).tolist(), 'z': dff.tolist()}
+    return years
 
-# processed_suicide_data.csv is used for bar charts and map
-df = pd.read_csv('processed_suicide_data.csv')
-# data.csv is used for scatter charts
-data = pd.read_csv('data.csv')
 
 app.layout = dbc.Container([
 
@@ -46,19 +154,37 @@ app.layout = dbc.Container([
         children=[
             dbc.Col(
                 children=[
-                    dcc.Graph(id='suicide_map', figure={}),
+                    dcc.Graph(id='suicide_map', figure=datasets.current.map_cache.get(2012) if CLIENTSIDE_MAP else {}),
+                    dcc.Store(id='map_years', data=map_years(datasets.current) if CLIENTSIDE_MAP else None),
+                    # names of the states clicked or lasso selected on the map
+                    dcc.Store(id='selected_states'),
+                    # random id of this browser tab, newer requests from it supersede older ones
+                    dcc.Store(id='client_id'),
                     html.Br(),
                     html.P(id='year_display', children={}),
                     html.P(id='selected_display', children={}),
 
-                    dcc.Slider(
+                    html.Div(id='select_year_box', children=dcc.Slider(
                         id='select_year',
                         min=2001,
                         max=2012,
                         step=1,
                         value=2012,
-                    ),
-
+                    )),
+                    # range mode: the map and the data by charts sum over the years in [start, end]
+                    html.Div(id='select_years_box', hidden=True, children=dcc.RangeSlider(
+                        id='select_years',
+                        min=2001,
+                        max=2012,
+                        step=1,
+                        value=[2001, 2012],
+                    )),
+                    dcc.Checklist(id='year_mode', options=[{'label': ' Sum over a range of years', 'value': 'range'}],
+                                  value=[], style={'display': 'none'} if CLIENTSIDE_MAP else {}),
+
+                    # districts of the clicked state, their geometry is only loaded on click
+                    html.P(id='district_display', children={}),
+                    dcc.Graph(id='district_map', figure={}),
                 ]
             )
         ]
@@ -120,6 +246,11 @@ app.layout = dbc.Container([
             dbc.Col(
                 children=[
                     dcc.Graph(id='trends_figure', figure={}),
+                    # fitted trend and 95% interval for the next years of each series
+                    dcc.Checklist(id='trends_projection', options=[{'label': ' Show projections', 'value': 'show'}],
+                                  value=['show']),
+                    # traces the browser is showing, lets the callback send a partial update
+                    dcc.Store(id='trends_shown'),
                 ]
             )
         ]
@@ -136,9 +267,8 @@ app.layout = dbc.Container([
                 children=[
                     dcc.Dropdown(id='data_by_select',
                                  value='profession',
-                                 options=[{'label': 'Data by Profession', 'value': 'profession'},
-                                          {'label': 'Data by Cause', 'value': 'cause'},
-                                          {'label': 'Data by Gender', 'value': 'gender'}, ],
+                                 # every column family of processed_suicide_data.csv, see families.py
+                                 options=datasets.current.cube.families.options(),
                                  className='col-3', clearable=False, searchable=False
                                  )
                 ]
@@ -149,7 +279,56 @@ app.layout = dbc.Container([
         children=[
             dbc.Col(
                 children=[
-                    dcc.Graph(id='data_by_figure', figure={})
+                    dcc.Graph(id='data_by_figure', figure={}),
+                    dcc.Store(id='data_by_shown'),
+                ]
+            )
+        ],
+    ),
+    html.Hr(),
+
+    # top 10 states or categories of the year on the slider, or of the last year of the range against the first
+    dbc.Row(
+        children=[
+            dbc.Col(
+                children=[
+                    dcc.Dropdown(id='leaderboard_kind',
+                                 value='states',
+                                 options=[{'label': 'States', 'value': 'states'}] +
+                                         [{'label': family.title, 'value': family.key}
+                                          for family in datasets.current.cube.families.charted()],
+                                 clearable=False),
+                ],
+                className='col-4'
+            ),
+            dbc.Col(
+                children=[
+                    dcc.Dropdown(id='leaderboard_metric',
+                                 value='change',
+                                 options=[{'label': 'Most suicides', 'value': 'count'},
+                                          {'label': 'Largest change', 'value': 'change'},
+                                          {'label': 'Largest relative change', 'value': 'rate'}],
+                                 clearable=False),
+                ],
+                className='col-4'
+            ),
+            dbc.Col(
+                children=[
+                    dcc.Dropdown(id='leaderboard_order',
+                                 value='desc',
+                                 options=[{'label': 'Rose most / highest', 'value': 'desc'},
+                                          {'label': 'Fell most / lowest', 'value': 'asc'}],
+                                 clearable=False),
+                ],
+                className='col-4'
+            ),
+        ]
+    ),
+    dbc.Row(
+        children=[
+            dbc.Col(
+                children=[
+                    dcc.Graph(id='leaderboard_figure', figure={}),
                 ]
             )
         ],
@@ -158,62 +337,139 @@ app.layout = dbc.Container([
 ])
 
 
+def year_span(year, mode, years):
+    # (start, end) of the years the map and the data by charts sum over, a single year unless range mode is on
+    if mode and 'range' in mode and years:
+        return min(years), max(years)
+    return year, year
+
+
+def span_label(start, end):
+    return str(start) if start == end else '{}-{}'.format(start, end)
+
+
 # connect Plotly graphs and Dash components
-@app.callback(
-    [Output(component_id='year_display', component_property='children'),
-     Output(component_id='suicide_map', component_property='figure')],
-    [Input(component_id='select_year', component_property='value')]
-)
-def update_graph(slider_select):
-    container = "Year: {}".format(slider_select)
+def update_graph(slider_select, mode=None, years=None):
+    start, end = year_span(slider_select, mode, years)
+    dataset = datasets.current
+
+    if start == end:
+        container = "Year: {}".format(start)
+        # every year is built at startup, so this is a dictionary lookup
+        with stage('cache'):
+            fig = dataset.map_cache.get(start)
+    else:
+        container = "Years: {}".format(span_label(start, end))
+        fig = memo.get(selection_key('map', (), start, end, dataset.version),
+                       lambda: figure_dict(map_figure(dataset, start, end)))
 
-    dff = df[df['Year'] == slider_select]
+    return container, fig
 
-    # Plotly Express
-    fig = px.choropleth(
-        data_frame=dff,
-        # api for map of india
-        # found here https://stackoverflow.com/questions/60910962/is-there-any-way-to-draw-india-map-in-plotly
-        geojson="https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw"
-                "/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson",
-        featureidkey='properties.ST_NM',
-        locations='State',
-        color='Total',  # z
-        hover_data=['State', 'Total'],
-        color_continuous_scale='PuRd',
-        range_color=[0, 20000],
-        labels={'Total': 'Total Suicides'},
+
+map_outputs = [Output(component_id='year_display', component_property='children'),
+               Output(component_id='suicide_map', component_property='figure')]
+
+if CLIENTSIDE_MAP:
+    # assets/map.js swaps the z values of the preloaded figure
+    app.clientside_callback(
+        ClientsideFunction(namespace='map', function_name='update_year'),
+        map_outputs,
+        [Input(component_id='select_year', component_property='value')],
+        [State(component_id='suicide_map', component_property='figure'),
+         State(component_id='map_years', component_property='data')]
     )
+else:
+    app.callback(map_outputs, [Input(component_id='select_year', component_property='value'),
+                               Input(component_id='year_mode', component_property='value'),
+                               Input(component_id='select_years', component_property='value')])(update_graph)
 
-    fig.update_geos(fitbounds="locations", visible=False)
 
-    return container, fig
+@app.callback([Output(component_id='select_year_box', component_property='hidden'),
+               Output(component_id='select_years_box', component_property='hidden')],
+              Input(component_id='year_mode', component_property='value'))
+def year_sliders(mode):
+    ranged = bool(mode) and 'range' in mode
+    return ranged, not ranged
 
 
-@app.callback(Output(component_id='selected_display', component_property='children'),
+# fires once on page load
+app.clientside_callback(
+    ClientsideFunction(namespace='session', function_name='client_id'),
+    Output(component_id='client_id', component_property='data'),
+    Input(component_id='client_id', component_property='storage_type')
+)
+
+
+def selected_text(states):
+    # return string for display
+    states_ret = 'State(s): '
+    for state in states:
+        states_ret = states_ret + str(state) + ', '
+
+    return states_ret
+
+
+# the only callback that reads the map selection, every chart below depends on its store
+@app.callback(Output(component_id='selected_states', component_property='data'),
               [Input(component_id='suicide_map', component_property='clickData'),
                Input(component_id='suicide_map', component_property='selectedData')])
-def display_selected_state(clicked, selected):
-    try:
-        if selected is None:
-            selected = clicked
-
-        # extract selected data
-        states = []
-        for point in selected['points']:
-            for attr, value in point.items():
-                if attr == 'location':
-                    states.append(str(value))
-
-        # return string for display
-        states_ret = 'State(s): '
-        for state in states:
-            states_ret = states_ret + str(state) + ', '
-
-        return states_ret
-    except TypeError:
+def select_states(clicked, selected):
+    states = selected_locations(clicked, selected)
+    if states is None:
+        return None
+    return to_store(states, datasets.current.cube.state_ids)
+
+
+@app.callback(Output(component_id='selected_display', component_property='children'),
+              Input(component_id='selected_states', component_property='data'))
+def display_selected_state(selected):
+    if selected is None:
         return 'No state(s) selected!'
 
+    states = from_store(selected, datasets.current.cube.state_ids)
+    return memo.get(selection_key('display', states), lambda: selected_text(states))
+
+
+def district_figure(dataset, state, start, end):
+    geojson = district_tiles.get(state)
+    totals = dataset.district_totals.get(state, start, end)
+    if geojson is None or totals is None:
+        return None
+
+    fig = go.Figure(go.Choropleth(geojson=geojson,
+                                  featureidkey='properties.' + DISTRICT_KEY,
+                                  locations=totals.index.astype(str),
+                                  z=totals.tolist(),
+                                  colorscale='PuRd',
+                                  colorbar_title='Total Suicides'))
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(title_text='Districts of ' + state + ' (' + span_label(start, end) + ')')
+    return figure_dict(fig)
+
+
+@app.callback([Output(component_id='district_map', component_property='figure'),
+               Output(component_id='district_display', component_property='children')],
+              [Input(component_id='selected_states', component_property='data'),
+               Input(component_id='select_year', component_property='value'),
+               Input(component_id='year_mode', component_property='value'),
+               Input(component_id='select_years', component_property='value')])
+def district_drilldown(selected, year, mode, years):
+    if selected is None:
+        return {}, 'Click a state to see its districts.'
+
+    dataset = datasets.current
+    states = from_store(selected, dataset.cube.state_ids)
+    if len(states) != 1:
+        return {}, 'Select a single state to see its districts.'
+
+    state = states[0]
+    start, end = year_span(year, mode, years)
+    fig = memo.get(selection_key('district', states, start, end, dataset.version),
+                   lambda: district_figure(dataset, state, start, end))
+    if fig is None:
+        return {}, 'No district data for ' + state + '.'
+    return fig, 'Districts of ' + state
+
 
 @app.callback([Output(component_id='age_select', component_property='options'),
                Output(component_id='age_select', component_property='value'),
@@ -238,187 +494,216 @@ def age_options(type_code):
         return options, value, disabled
 
 
+# dropdown values of the trends chart mapped to data.csv values
+TYPE_CODES = {0: 'Professional_Profile', 1: 'Causes', 2: 'Social_Status', 3: 'Education_Status'}
+GENDERS = {0: ['Male'], 1: ['Female'], 2: None}
+AGE_GROUPS = {0: '0-14', 1: '15-29', 2: '30-44', 3: '45-59', 4: '60+'}
+
+
+# one colour per Type, shared by its series and its projection
+COLORS = px.colors.qualitative.Plotly
+
+
+def trends_figure(dataset, states, type_code, genders, age_group, projections=False):
+    # one indexed lookup instead of refining the whole data set filter by filter
+    with stage('filter'):
+        refined_data = dataset.data_index.select(states, type_code, genders, age_group)
+
+    # one grouped aggregation gives every series
+    checkpoint()
+    with stage('aggregate'):
+        types, totals = trend_series(refined_data, YEARS)
+
+    # sums of the lines fitted at load, nothing is fitted here
+    projected = {}
+    if projections:
+        with stage('projection'):
+            projected = dataset.trend_fits.projection(states, type_code, genders, age_group)
+
+    checkpoint()
+    with stage('figure'):
+        fig = go.Figure()
+        future = dataset.trend_fits.future.tolist()
+
+        # added in one call, add_trace copies the figure's data every time
+        traces = []
+        for i, (type, y) in enumerate(zip(types, totals)):
+            color = COLORS[i % len(COLORS)]
+            traces.append(go.Scatter(x=YEARS,
+                                     y=y.tolist(),
+                                     mode='lines+markers', name=type, legendgroup=type, line=dict(color=color)))
+            if type in projected:
+                mean, lower, upper = projected[type]
+                # 95% prediction interval, then the trend line continued past the data
+                traces.append(go.Scatter(x=future + future[::-1], y=upper.tolist() + lower[::-1].tolist(),
+                                         fill='toself', fillcolor=color, opacity=0.15, line=dict(width=0),
+                                         hoverinfo='skip', name=type + ' (95% interval)', legendgroup=type,
+                                         showlegend=False))
+                traces.append(go.Scatter(x=future, y=mean.tolist(), mode='lines', line=dict(color=color, dash='dash'),
+                                         name=type + ' (projection)', legendgroup=type, showlegend=False))
+        fig.add_traces(traces)
+
+        return figure_dict(fig)
+
+
 @app.callback([Output(component_id='trends_figure', component_property='figure'),
-               Output(component_id='type_code_error', component_property='hidden')],
-              [Input(component_id='suicide_map', component_property='clickData'),
-               Input(component_id='suicide_map', component_property='selectedData'),
+               Output(component_id='type_code_error', component_property='hidden'),
+               Output(component_id='trends_shown', component_property='data')],
+              [Input(component_id='selected_states', component_property='data'),
                Input(component_id='type_code_select', component_property='value'),
                Input(component_id='gender_select', component_property='value'),
-               Input(component_id='age_select', component_property='value')])
-def trends_fig(clicked, selected, type_code, gender, age):
+               Input(component_id='age_select', component_property='value'),
+               Input(component_id='trends_projection', component_property='value')],
+              [State(component_id='trends_shown', component_property='data'),
+               State(component_id='client_id', component_property='data')])
+def trends_fig(selected, type_code, gender, age, projection, shown, client_id=None):
+    # init display
+    if selected is None:
+        hidden = False
+        fig = go.Figure()
+        return fig, hidden, None
+
+    dataset = datasets.current
+    states = from_store(selected, dataset.cube.state_ids)
+
+    # profession, cause, social status or education
+    selected_code = TYPE_CODES.get(type_code, 'Education_Status')
+    # male, female or male & female
+    selected_gender = GENDERS.get(gender)
+    # age options for profession and causes type code, education and social status only have one range
+    if type_code == 0 or type_code == 1:
+        selected_age = AGE_GROUPS.get(age, '60+')
+    else:
+        selected_age = '0-100+'
+
+    projections = bool(projection) and 'show' in projection
+
+    key = selection_key('trends', states, selected_code, selected_gender and tuple(selected_gender), selected_age,
+                        projections, dataset.version)
+    compute = instrumentation.bound(
+        lambda: memo.get(key, lambda: trends_figure(dataset, states, selected_code, selected_gender, selected_age,
+                                                    projections)))
     try:
-        if selected is None:
-            selected = clicked
-
-        # extract selected data
-        states = []
-        for point in selected['points']:
-            for attr, value in point.items():
-                if attr == 'location':
-                    states.append(str(value))
-
-        # return string for display
-        states_ret = 'State(s): '
-        for state in states:
-            states_ret = states_ret + str(state) + ', '
-
-        # keep on refining the data set based on the input
-        selected_states = data[data['State'].isin(states)]
-
-        # profession
-        if type_code == 0:
-            selected_code = selected_states[selected_states['Type_code'] == 'Professional_Profile']
-        # cause
-        elif type_code == 1:
-            selected_code = selected_states[selected_states['Type_code'] == 'Causes']
-        # social status, special age range
-        elif type_code == 2:
-            selected_code = selected_states[selected_states['Type_code'] == 'Social_Status']
-        # education, special age range
-        else:
-            selected_code = selected_states[selected_states['Type_code'] == 'Education_Status']
-
-        # male
-        if gender == 0:
-            selected_gender = selected_code[selected_code['Gender'] == 'Male']
-        # female
-        elif gender == 1:
-            selected_gender = selected_code[selected_code['Gender'] == 'Female']
-        # male & female
-        else:
-            selected_gender = selected_code
-
-        # age options for profession and causes type code
-        if type_code == 0 or type_code == 1:
-            if age == 0:
-                selected_age = selected_gender[selected_gender['Age_group'] == '0-14']
-            elif age == 1:
-                selected_age = selected_gender[selected_gender['Age_group'] == '15-29']
-            elif age == 2:
-                selected_age = selected_gender[selected_gender['Age_group'] == '30-44']
-            elif age == 3:
-                selected_age = selected_gender[selected_gender['Age_group'] == '45-59']
-            else:
-                selected_age = selected_gender[selected_gender['Age_group'] == '60+']
-        # age options for education and social status type code
-        else:
-            selected_age = selected_gender[selected_gender['Age_group'] == '0-100+']
+        fig = job_queue.run(client_id, 'trends', key, compute)
+    except Superseded:
+        # the browser already asked for a newer selection
+        raise PreventUpdate
 
-        refined_data = selected_age
-        uniqueValues = refined_data['Type'].unique()
+    # same series as on screen (e.g. only gender or age changed), only the y values are sent
+    fig, shown = figure_update(fig, shown)
 
-        fig = go.Figure()
+    hidden = True
+    return fig, hidden, shown
 
-        years = [2001, 2002, 2003, 2004, 2005, 2006, 2007, 2008, 2009, 2010, 2011, 2012]
 
-        for type in uniqueValues:
-            y = []
-            for year in years:
-                temp = refined_data[refined_data['Type'] == type]
-                y.append(temp[temp['Year'] == year]['Total'].sum())
+def data_by_figure(dataset, figure_select, states, start, end):
+    # summed counts of the family's columns for the selected states, one slice of the cube
+    family = dataset.cube.families[figure_select]
+    with stage('query'):
+        labels, values = dataset.cube.query_range(family.key, states, start, end)
+    values = values.tolist()
 
-            fig.add_trace(go.Scatter(x=years,
-                                     y=y,
-                                     mode='lines+markers', name=type))
+    if family.key == 'gender':
+        gender_bar = go.Figure()
+        for label, value, colorscale in zip(labels, values, ['PuRd', 'reds']):
+            gender_bar.add_trace(go.Bar(y=['Gender'], x=[value], name=label, orientation='h',
+                                        marker=dict(color=[value], colorscale=colorscale)))
+        gender_bar.update_layout(title_text='Data by Gender (' + span_label(start, end) + ')')
 
-        hidden = True
-        return fig, hidden
-    # init display
-    except TypeError:
-        hidden = False
-        fig = go.Figure()
-        return fig, hidden
+        return figure_dict(gender_bar)
+
+    # chart for profession, cause, education, social status or means adopted
+    family_bar = go.Figure()
+    family_bar.add_trace(go.Bar(x=labels, y=values, marker=dict(color=values, colorscale='PuRd')))
+    family_bar.update_layout(title_text='Data by ' + family.title + ' (' + span_label(start, end) + ')')
+
+    return figure_dict(family_bar)
 
 
 @app.callback([Output(component_id='data_by_figure', component_property='figure'),
-               Output(component_id='data_by_error', component_property='hidden')],
+               Output(component_id='data_by_error', component_property='hidden'),
+               Output(component_id='data_by_shown', component_property='data')],
               [Input(component_id='data_by_select', component_property='value'),
                Input(component_id='select_year', component_property='value'),
-               Input(component_id='suicide_map', component_property='clickData'),
-               Input(component_id='suicide_map', component_property='selectedData')])
-def data_by(figure_select, year, clicked, selected):
-    try:
-        if selected is None:
-            selected = clicked
-
-        locations_str = ['State(s) Selected: ']
-        locations = []
-        for point in selected['points']:
-            for attr, value in point.items():
-                if attr == 'location':
-                    locations_str.append(str(value) + ", ")
-                    locations.append(str(value))
-
-        # combine all select states into one df series
-        # this is what the figures will use for data
-        selected_states = df[df['State'].isin(locations)]
-
-        selected_states = selected_states[selected_states['Year'] == year]
-
-        if figure_select == 'profession':
-            # get all professions
-            professions = []
-            for col in selected_states.columns:
-                if 'Professional_Profile_' in col:
-                    professions.append(col)
-
-            # slice the profession strings so they just say the professions
-            professions_sliced = []
-            for profession in professions:
-                professions_sliced.append(profession[21:])
-
-            # y values for professions
-            profession_values = []
-            for profession in professions:
-                profession_values.append(selected_states[profession].sum())
-
-            # chart for profession
-            professions_bar = go.Figure()
-            professions_bar.add_trace(go.Bar(x=professions_sliced, y=profession_values,
-                                      marker=dict(color=profession_values, colorscale='PuRd')))
-            professions_bar.update_layout(title_text='Data by Profession (' + str(year) + ')')
-
-            return professions_bar, True
-
-        elif figure_select == 'cause':
-            # get all causes
-            causes = []
-            for column in selected_states.columns:
-                if 'Causes_' in column:
-                    causes.append(column)
-
-            # slice the causes strings so they just say the causes
-            causes_sliced = []
-            for cause in causes:
-                causes_sliced.append(cause[7:])
-
-            # y value for causes
-            causes_values = []
-            for cause in causes:
-                causes_values.append(selected_states[cause].sum())
-
-            # chart for causes
-            causes_bar = go.Figure()
-            causes_bar.add_trace(go.Bar(x=causes_sliced, y=causes_values,
-                                        marker=dict(color=causes_values, colorscale='PuRd')))
-            causes_bar.update_layout(title_text='Data by Cause (' + str(year) + ')')
-
-            return causes_bar, True
-
-        else:  # gender
-            gender_bar = go.Figure()
-            gender_bar.add_trace(
-                go.Bar(y=['Gender'], x=[selected_states['Female'].sum()], name='Female', orientation='h',
-                       marker=dict(color=[selected_states['Female'].sum()], colorscale='PuRd')))
-            gender_bar.add_trace(go.Bar(y=['Gender'], x=[selected_states['Male'].sum()], name='Male', orientation='h',
-                                        marker=dict(color=[selected_states['Male'].sum()], colorscale='reds')))
-            gender_bar.update_layout(title_text='Data by Gender (' + str(year) + ')')
-
-            return gender_bar, True
-
-    except TypeError:
+               Input(component_id='selected_states', component_property='data'),
+               Input(component_id='year_mode', component_property='value'),
+               Input(component_id='select_years', component_property='value')],
+              [State(component_id='data_by_shown', component_property='data'),
+               State(component_id='client_id', component_property='data')])
+def data_by(figure_select, year, selected, mode, years, shown, client_id=None):
+    if selected is None:
         no = go.Figure()
-        return no, False
+        return no, False, None
+
+    dataset = datasets.current
+    states = from_store(selected, dataset.cube.state_ids)
+
+    if figure_select not in {family.key for family in dataset.cube.families.charted()}:
+        figure_select = 'gender'
+
+    start, end = year_span(year, mode, years)
+    key = selection_key('data_by', states, start, end, figure_select, dataset.version)
+    compute = instrumentation.bound(lambda: bars_figure(dataset, figure_select, states, start, end))
+    try:
+        fig = job_queue.run(client_id, 'data_by', key, compute)
+    except Superseded:
+        raise PreventUpdate
+
+    # same bars as on screen (e.g. only the years or states changed), only the values are sent
+    fig, shown = figure_update(fig, shown)
+    return fig, True, shown
+
+
+METRIC_TITLES = {'count': 'Suicides', 'change': 'Change', 'rate': 'Relative change'}
+
+
+def leaderboard_figure(dataset, kind, metric, start, end, largest):
+    with stage('query'):
+        if start == end:
+            rows = dataset.rankings.top(kind, metric, end, largest=largest)
+        else:
+            rows = dataset.rankings.between(kind, metric, start, end, largest=largest)
+
+    # a single year is compared with the year before, a range with its first year
+    since = '' if metric == 'count' else ' since ' + str(start if start != end else end - 1)
+    title = METRIC_TITLES[metric] + since + ' (' + str(end) + ')'
+    # best first, from the top down
+    names = [name for name, value in reversed(rows)]
+    values = [value for name, value in reversed(rows)]
+    fig = go.Figure(go.Bar(x=values, y=names, orientation='h', marker=dict(color=values, colorscale='PuRd')))
+    fig.update_layout(title_text=title, xaxis_tickformat='.0%' if metric == 'rate' else None)
+    return figure_dict(fig)
+
+
+@app.callback(Output(component_id='leaderboard_figure', component_property='figure'),
+              [Input(component_id='leaderboard_kind', component_property='value'),
+               Input(component_id='leaderboard_metric', component_property='value'),
+               Input(component_id='leaderboard_order', component_property='value'),
+               Input(component_id='select_year', component_property='value'),
+               Input(component_id='year_mode', component_property='value'),
+               Input(component_id='select_years', component_property='value')])
+def leaderboard(kind, metric, order, year, mode, years):
+    dataset = datasets.current
+    start, end = year_span(year, mode, years)
+    if kind not in dataset.rankings.entities or metric not in METRIC_TITLES:
+        return {}
+    largest = order != 'asc'
+    return memo.get(selection_key('leaderboard', (), kind, metric, start, end, largest, dataset.version),
+                    lambda: leaderboard_figure(dataset, kind, metric, start, end, largest))
+
+
+def bars_figure(dataset, figure_select, states, start, end):
+    return memo.get(selection_key('data_by', states, start, end, figure_select, dataset.version),
+                    lambda: data_by_figure(dataset, figure_select, states, start, end))
+
+
+# cacheable GET /api/map/<year> and /api/bars/<family>/<year>?states=...
+api.install(server, lambda: datasets.current.version, lambda year: datasets.current.map_cache.get(year),
+            lambda figure_select, states, year: bars_figure(datasets.current, figure_select, states, year, year),
+            [family.key for family in datasets.current.cube.families.charted()],
+            lambda: datasets.current.cube.year_ids, lambda: datasets.current.cube.state_ids)
+# GET /api/top/<kind>/<year>, answered from the ranking index
+api.install_rankings(server, lambda: datasets.current.version, lambda: datasets.current.rankings)
 
 
 if __name__ == '__main__':
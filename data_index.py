@@ -0,0 +1,49 @@
+import numpy as np
+
+# columns trends_fig narrows data.csv by, outermost first
+KEYS = ['Type_code', 'Age_group', 'Gender', 'State']
+
+
+class LongIndex:
+    # data.csv sorted by KEYS once at load, with the row range of every key combination
+    # a selection is a handful of slices instead of four boolean scans over the whole frame
+
+    def __init__(self, data, columns=('Type', 'Year', 'Total')):
+        frame = data[KEYS + list(columns)].copy()
+        for key in KEYS + ['Type']:
+            if key in frame:
+                frame[key] = frame[key].astype('category')
+
+        # remember where each row came from so selections keep the original row order
+        frame['row'] = np.arange(len(frame))
+        frame = frame.sort_values(KEYS, kind='stable').reset_index(drop=True)
+
+        self.frame = frame[list(columns)]
+        self.rows = frame['row'].to_numpy()
+        self.values = {key: list(frame[key].cat.categories) for key in KEYS}
+
+        # (type_code, age_group, gender, state) -> (start, stop) in the sorted frame
+        self.offsets = {}
+        for key, positions in frame.groupby(KEYS, observed=True, sort=False).indices.items():
+            self.offsets[key] = (positions[0], positions[-1] + 1)
+
+    def positions(self, states, type_code, genders=None, age_group=None):
+        # genders / age_group of None means every value, like skipping that filter
+        genders = self.values['Gender'] if genders is None else genders
+        age_groups = self.values['Age_group'] if age_group is None else [age_group]
+
+        ranges = []
+        for age in age_groups:
+            for gender in genders:
+                for state in states:
+                    bounds = self.offsets.get((type_code, age, gender, state))
+                    if bounds is not None:
+                        ranges.append(np.arange(bounds[0], bounds[1]))
+        if not ranges:
+            return np.zeros(0, dtype=int)
+
+        positions = np.concatenate(ranges)
+        return positions[np.argsort(self.rows[positions], kind='stable')]
+
+    def select(self, states, type_code, genders=None, age_group=None):
+        return self.frame.iloc[self.positions(states, type_code, genders, age_group)]
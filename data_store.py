@@ -0,0 +1,115 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# the csv files are the source of truth, the store holds typed columnar copies of them
+# DASHBOARD_WIDE_CSV / DASHBOARD_LONG_CSV point the dashboard at other files, e.g. the output of synthetic.py
+WIDE_CSV = os.environ.get('DASHBOARD_WIDE_CSV', 'processed_suicide_data.csv')
+LONG_CSV = os.environ.get('DASHBOARD_LONG_CSV', 'data.csv')
+STORE_DIR = 'store'
+
+# columns of data.csv with few distinct values
+LONG_CATEGORIES = ['State', 'Type_code', 'Type', 'Gender', 'Age_group']
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def store_path(csv_path, store_dir=STORE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(store_dir, name + '.parquet')
+
+
+def compact_wide(df):
+    # processed_suicide_data.csv: one row per state and year, every other numeric column is a whole count
+    df = df.copy()
+    df['Year'] = df['Year'].astype(np.int16)
+    for col in df.columns:
+        if col == 'Year':
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].fillna(0).astype(np.int32)
+        else:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def compact_long(data):
+    data = data.copy()
+    for col in LONG_CATEGORIES:
+        if col in data:
+            data[col] = data[col].astype('category')
+    data['Year'] = data['Year'].astype(np.int16)
+    data['Total'] = data['Total'].astype(np.int32)
+    return data
+
+
+def read_wide_csv(path=WIDE_CSV):
+    # the first column is the index written by the preprocessing notebook
+    return compact_wide(pd.read_csv(path, index_col=0))
+
+
+def read_long_csv(path=LONG_CSV):
+    return compact_long(pd.read_csv(path))
+
+
+def is_fresh(csv_path, parquet_path):
+    return os.path.exists(parquet_path) and (not os.path.exists(csv_path) or
+                                             os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))
+
+
+def load(csv_path, reader, store_dir=STORE_DIR):
+    # read the columnar copy when it is at least as new as the csv, otherwise parse the csv
+    if csv_path.endswith('.parquet'):
+        return pd.read_parquet(csv_path)
+    parquet_path = store_path(csv_path, store_dir)
+    if HAS_PYARROW and is_fresh(csv_path, parquet_path):
+        return pd.read_parquet(parquet_path)
+    return reader(csv_path)
+
+
+def load_wide(path=WIDE_CSV, store_dir=STORE_DIR):
+    return load(path, read_wide_csv, store_dir)
+
+
+def load_long(path=LONG_CSV, store_dir=STORE_DIR):
+    return load(path, read_long_csv, store_dir)
+
+
+def source_paths(wide_path=WIDE_CSV, long_path=LONG_CSV, store_dir=STORE_DIR):
+    # every file load_wide and load_long may read
+    paths = []
+    for path in (wide_path, long_path):
+        paths.append(path)
+        if not path.endswith('.parquet'):
+            paths.append(store_path(path, store_dir))
+    return paths
+
+
+def convert(store_dir=STORE_DIR, wide_path=WIDE_CSV, long_path=LONG_CSV):
+    if not HAS_PYARROW:
+        raise RuntimeError('converting to parquet needs pyarrow, run `pip install pyarrow`')
+
+    os.makedirs(store_dir, exist_ok=True)
+    written = []
+    for csv_path, reader in ((wide_path, read_wide_csv), (long_path, read_long_csv)):
+        if not os.path.exists(csv_path):
+            print('skipping ' + csv_path + ', file not found')
+            continue
+        parquet_path = store_path(csv_path, store_dir)
+        reader(csv_path).to_parquet(parquet_path, index=False)
+        written.append(parquet_path)
+    return written
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'convert':
+        for path in convert():
+            print('wrote ' + path)
+    else:
+        print('usage: python data_store.py convert')
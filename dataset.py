@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+import api
+import data_store
+from cube import Cube
+from data_index import LongIndex
+from districts import DistrictTotals
+from forecast import TrendFits
+from ranking import Rankings
+
+# hot reload of the data files: a background thread polls them and, once a change has settled, builds the new
+# version next to the old one and swaps it in, requests in flight finish on the version they started with
+# DASHBOARD_RELOAD=0 turns the watcher off, DASHBOARD_RELOAD_SECONDS is the polling interval
+RELOAD = os.environ.get('DASHBOARD_RELOAD', '1') == '1'
+INTERVAL = float(os.environ.get('DASHBOARD_RELOAD_SECONDS', 5))
+
+
+class Dataset:
+    # one version of the data and everything derived from it, replaced as a whole and not modified once in use
+
+    def __init__(self, df, data):
+        # processed_suicide_data.csv, used for bar charts and map
+        self.df = df
+        # data.csv, used for the trends chart
+        self.data = data
+        # sorted categorical index over data.csv so each trends selection is a few slices
+        self.data_index = LongIndex(data)
+        # a trend line per data.csv series, summed for the projections on the trends chart
+        self.trend_fits = TrendFits(data)
+        # state x year x category sums for the data by bar charts
+        self.cube = Cube(df)
+        # top k states and categories of every family per year, for the leaderboard
+        self.rankings = Rankings(self.cube)
+        # district totals for the drill-down map, computed per state on first click
+        self.district_totals = DistrictTotals(df)
+        # part of every cache key and etag
+        self.version = api.dataset_version(df, data)
+
+
+def load_dataset():
+    return Dataset(data_store.load_wide(), data_store.load_long())
+
+
+def signature(paths):
+    # modification time and size of each file, None for missing ones
+    result = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            result.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            result.append((path, None))
+    return tuple(result)
+
+
+class DatasetManager:
+
+    def __init__(self, load=load_dataset, prepare=None, paths=None, interval=INTERVAL):
+        # prepare(dataset) adds derived state, e.g. warm figure caches, before the dataset is swapped in
+        self.load = load
+        self.prepare = prepare
+        self.paths = data_store.source_paths() if paths is None else paths
+        self.interval = interval
+        self.listeners = []
+        # one reload at a time, requests never wait for it
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.pid = None
+        self.reloads = 0
+        self.failures = 0
+        self.signature = signature(self.paths)
+        self.current = self.build()
+
+    def build(self):
+        dataset = self.load()
+        if self.prepare is not None:
+            self.prepare(dataset)
+        return dataset
+
+    def on_swap(self, listener):
+        # listener(new, old) runs after every swap, e.g. to drop cache entries of the old version
+        self.listeners.append(listener)
+        return listener
+
+    def reload(self):
+        with self.lock:
+            files = signature(self.paths)
+            try:
+                dataset = self.build()
+            except Exception as error:
+                # a broken file keeps the old version until the files change again
+                print('warning: reloading the data failed, keeping version ' + self.current.version + ': ' +
+                      repr(error))
+                self.failures += 1
+                self.signature = files
+                return False
+            old, self.current = self.current, dataset
+            self.signature = files
+            self.reloads += 1
+
+        # a failing listener must not end the watch thread, which would stop reloads in this worker for good
+        for listener in self.listeners:
+            try:
+                listener(dataset, old)
+            except Exception as error:
+                print('warning: reload listener ' + getattr(listener, '__name__', repr(listener)) + ' failed: ' +
+                      repr(error))
+        print('reloaded the data, version ' + old.version + ' -> ' + dataset.version)
+        return True
+
+    def watch(self):
+        pending = None
+        while True:
+            time.sleep(self.interval)
+            files = signature(self.paths)
+            if files == self.signature:
+                pending = None
+            elif files != pending:
+                # wait one more interval without changes so a file that is still being written is not read
+                pending = files
+            else:
+                self.reload()
+                pending = None
+
+    def start(self):
+        # once per process, threads do not survive the fork of preloaded gunicorn workers
+        if self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self.watch, name='dataset-watch', daemon=True).start()
+
+    def stats(self):
+        return {'version': self.current.version,
+                'reloads': self.reloads,
+                'failures': self.failures}
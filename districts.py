@@ -0,0 +1,104 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import geometry
+
+# district boundaries, one geojson file per state so the state map never carries them
+#   district_geojson/<State_Name>.geojson with the district name in properties.DISTRICT
+# a state's file is read and simplified the first time that state is drilled into, then kept in memory
+TILE_DIR = 'district_geojson'
+DISTRICT_KEY = 'DISTRICT'
+
+
+def tile_name(state):
+    return re.sub(r'[^A-Za-z0-9]+', '_', state).strip('_') + '.geojson'
+
+
+class LRU:
+    # small thread safe least recently used map for per state caches
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DistrictTiles:
+
+    def __init__(self, directory=TILE_DIR, tolerance=geometry.TOLERANCE, maxsize=16):
+        self.directory = directory
+        self.tolerance = tolerance
+        self.cache = LRU(maxsize)
+
+    def path(self, state):
+        return os.path.join(self.directory, tile_name(state))
+
+    def has(self, state):
+        return os.path.exists(self.path(state))
+
+    def load(self, state):
+        with open(self.path(state)) as f:
+            collection = json.load(f)
+        # districts are simplified together so their shared borders still meet
+        geometries = geometry.simplify_geometries([feature['geometry'] for feature in collection['features']],
+                                                  self.tolerance)
+        features = []
+        for feature, simplified in zip(collection['features'], geometries):
+            features.append({'type': 'Feature',
+                             'properties': {DISTRICT_KEY: feature['properties'][DISTRICT_KEY]},
+                             'geometry': simplified})
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def get(self, state):
+        # None when there is no tile for the state
+        if not self.has(state):
+            return None
+        return self.cache.get(state, lambda: self.load(state))
+
+
+class DistrictTotals:
+    # Total per district and year, aggregated for a state the first time it is asked for
+    # needs district level rows (a District column), e.g. from synthetic.py
+
+    def __init__(self, df, maxsize=16):
+        self.df = df
+        self.available = 'District' in df.columns
+        self.cache = LRU(maxsize)
+
+    def aggregate(self, state):
+        rows = self.df[self.df['State'] == state]
+        totals = rows.groupby(['Year', 'District'], observed=True)['Total'].sum()
+        return {int(year): group.droplevel('Year') for year, group in totals.groupby(level='Year')}
+
+    def get(self, state, start, end):
+        # Total per district over the years [start, end], None when the state has no district rows in them
+        if not self.available:
+            return None
+        years = self.cache.get(state, lambda: self.aggregate(state))
+        totals = [years[year] for year in range(start, end + 1) if year in years]
+        if not totals:
+            return None
+        if len(totals) == 1:
+            return totals[0]
+        return pd.concat(totals).groupby(level=0, observed=True).sum()
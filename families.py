@@ -0,0 +1,58 @@
+# column families of processed_suicide_data.csv: key (dropdown and url value), chart title, column prefix
+PREFIXED = [('profession', 'Profession', 'Professional_Profile_'),
+            ('cause', 'Cause', 'Causes_'),
+            ('education', 'Education Status', 'Education_Status_'),
+            ('social', 'Social Status', 'Social_Status_'),
+            ('means', 'Means Adopted', 'Means_adopted_')]
+# families of fixed columns
+FIXED = [('gender', 'Gender', ['Female', 'Male']),
+         ('total', 'Total', ['Total'])]
+
+
+class Family:
+
+    def __init__(self, key, title, prefix, columns, start):
+        self.key = key
+        self.title = title
+        # '' for the fixed families
+        self.prefix = prefix
+        # names in processed_suicide_data.csv and as shown on the charts
+        self.columns = columns
+        self.labels = [column[len(prefix):] for column in columns]
+        # contiguous positions in the registry's column order, sums over a family are one slice
+        self.block = slice(start, start + len(columns))
+
+
+class Registry:
+    # every family found in the columns of a data frame, built once at load
+    # the families' columns are laid out back to back in self.columns, in the order of PREFIXED then FIXED
+
+    def __init__(self, columns):
+        columns = list(columns)
+        self.families = {}
+        self.columns = []
+        for key, title, prefix in PREFIXED:
+            self.add(Family(key, title, prefix, [col for col in columns if col.startswith(prefix)], len(self.columns)))
+        for key, title, fixed in FIXED:
+            self.add(Family(key, title, '', [col for col in fixed if col in columns], len(self.columns)))
+
+    def add(self, family):
+        self.families[family.key] = family
+        self.columns += family.columns
+
+    def __getitem__(self, key):
+        return self.families[key]
+
+    def __contains__(self, key):
+        return key in self.families
+
+    def __iter__(self):
+        return iter(self.families.values())
+
+    def charted(self):
+        # families with columns, total is not a chart of its own
+        return [family for family in self if family.columns and family.key != 'total']
+
+    def options(self):
+        # data_by_select options
+        return [{'label': 'Data by ' + family.title, 'value': family.key} for family in self.charted()]
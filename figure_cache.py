@@ -0,0 +1,50 @@
+import threading
+
+
+class FigureCache:
+    # memoizes serialized figures by key, the data behind them is static so entries never expire
+
+    def __init__(self, builder, encode=None):
+        self.builder = builder
+        # turns a built figure into what is stored and served, a plain dict by default
+        self.encode = encode or (lambda fig: fig.to_dict())
+        self.figures = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        figure = self.figures.get(key)
+        if figure is not None:
+            self.hits += 1
+            return figure
+
+        with self.lock:
+            # another thread may have built it while we waited
+            figure = self.figures.get(key)
+            if figure is None:
+                self.misses += 1
+                figure = self.encode(self.builder(key))
+                self.figures[key] = figure
+            else:
+                self.hits += 1
+        return figure
+
+    def warm(self, keys):
+        # build every figure up front so the first user does not pay for it
+        for key in keys:
+            if key not in self.figures:
+                with self.lock:
+                    if key not in self.figures:
+                        self.figures[key] = self.encode(self.builder(key))
+
+    def clear(self):
+        with self.lock:
+            self.figures = {}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'size': len(self.figures),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
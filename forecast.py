@@ -0,0 +1,127 @@
+import sys
+
+import numpy as np
+
+from data_index import KEYS
+from trends import YEARS
+
+# years projected past the last year of data
+HORIZON = 3
+
+# two sided 95% quantiles of Student's t by degrees of freedom, larger samples use the nearest smaller entry
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+       11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 20: 2.086, 30: 2.042, 60: 2.000, 120: 1.980}
+
+
+def t95(dof):
+    return T95[max(key for key in T95 if key <= dof)] if dof >= 1 else np.nan
+
+
+def ols(years, series):
+    # least squares line of every row of series (n x years) at once
+    # returns the slope per year, the fitted value at the mean year and the residuals
+    centred = years - years.mean()
+    slope = series @ centred / (centred @ centred)
+    level = series.mean(axis=1)
+    residuals = series - level[:, np.newaxis] - slope[:, np.newaxis] * centred
+    return slope, level, residuals
+
+
+def theil_sen(years, series):
+    # median of the slopes between every pair of years, robust to a few outlying years
+    i, j = np.triu_indices(len(years), k=1)
+    return np.median((series[:, j] - series[:, i]) / (years[j] - years[i]), axis=1)
+
+
+def year_over_year(series):
+    # relative change from the second to last year to the last, nan when the earlier year is 0
+    before, last = series[:, -2], series[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(before != 0, (last - before) / before, np.nan)
+
+
+def project(years, future, slope, level, residuals):
+    # fitted line over the future years with a 95% prediction interval, counts do not go below 0
+    n = len(years)
+    centred = future - years.mean()
+    spread = ((years - years.mean()) ** 2).sum()
+    mean = level[:, np.newaxis] + slope[:, np.newaxis] * centred
+    if n <= 2:
+        return mean, mean, mean
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+    half = t95(n - 2) * sigma[:, np.newaxis] * np.sqrt(1 + 1 / n + centred ** 2 / spread)
+    return mean, np.maximum(mean - half, 0), mean + half
+
+
+class TrendFits:
+    # a line fitted to every State x Type_code x Age_group x Gender x Type series of data.csv once at load
+    # lines are additive, so the projection of the sum of any selection of series is a sum of stored
+    # coefficients and residuals, no model is fitted per request
+
+    def __init__(self, data, years=YEARS, horizon=HORIZON):
+        self.years = np.array(years, dtype=np.float64)
+        self.future = np.arange(years[-1] + 1, years[-1] + 1 + horizon)
+
+        totals = data.groupby(KEYS + ['Type', 'Year'], observed=True)['Total'].sum()
+        grid = totals.unstack('Year', fill_value=0).reindex(columns=years, fill_value=0)
+        # one row per series, sorted by KEYS then Type
+        self.keys = grid.index.to_frame(index=False)
+        self.series = grid.to_numpy(dtype=np.float64)
+
+        self.slope, self.level, self.residuals = ols(self.years, self.series)
+        self.robust_slope = theil_sen(self.years, self.series) if len(self.series) else np.zeros(0)
+        self.change = year_over_year(self.series) if len(self.series) else np.zeros(0)
+
+        types = self.keys['Type'].astype(str).to_numpy()
+        self.types, self.type_ids = np.unique(types, return_inverse=True)
+        self.values = {key: list(self.keys[key].astype('category').cat.categories) for key in KEYS}
+        # (type_code, age_group, gender, state) -> rows of its series
+        self.rows = self.keys.groupby(KEYS, observed=True, sort=False).indices if len(self.keys) else {}
+
+    def table(self):
+        # every series with its slopes, last year over year change and projections
+        table = self.keys.copy()
+        table['slope'] = self.slope
+        table['robust_slope'] = self.robust_slope
+        table['yoy_change'] = self.change
+        mean, lower, upper = project(self.years, self.future, self.slope, self.level, self.residuals)
+        for i, year in enumerate(self.future):
+            table['forecast_' + str(year)] = mean[:, i]
+            table['lower_' + str(year)] = lower[:, i]
+            table['upper_' + str(year)] = upper[:, i]
+        return table
+
+    def positions(self, states, type_code, genders=None, age_group=None):
+        # genders / age_group of None means every value, as in LongIndex.positions
+        genders = self.values['Gender'] if genders is None else genders
+        age_groups = self.values['Age_group'] if age_group is None else [age_group]
+
+        rows = [self.rows[key] for key in ((type_code, age, gender, state) for age in age_groups
+                                           for gender in genders for state in states) if key in self.rows]
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.intp)
+
+    def projection(self, states, type_code, genders=None, age_group=None):
+        # Type -> (forecast, lower, upper) over self.future for the summed series of the selection
+        rows = self.positions(states, type_code, genders, age_group)
+        if not len(rows):
+            return {}
+
+        type_ids = self.type_ids[rows]
+        n_types = len(self.types)
+        slope = np.bincount(type_ids, weights=self.slope[rows], minlength=n_types)
+        level = np.bincount(type_ids, weights=self.level[rows], minlength=n_types)
+        residuals = np.zeros((n_types, len(self.years)))
+        np.add.at(residuals, type_ids, self.residuals[rows])
+
+        present = np.flatnonzero(np.bincount(type_ids, minlength=n_types))
+        mean, lower, upper = project(self.years, self.future, slope[present], level[present], residuals[present])
+        return {self.types[type_id]: (mean[i], lower[i], upper[i]) for i, type_id in enumerate(present)}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == 'table':
+        import data_store
+        TrendFits(data_store.load_long()).table().to_csv(sys.argv[2], index=False)
+        print('wrote ' + sys.argv[2])
+    else:
+        print('usage: python forecast.py table output.csv')
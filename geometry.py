@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+import urllib.request
+
+import numpy as np
+
+# state boundaries for the choropleth, originally pulled from this gist on every render
+# found here https://stackoverflow.com/questions/60910962/is-there-any-way-to-draw-india-map-in-plotly
+GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw" \
+              "/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+GEOJSON_PATH = 'india_states.geojson'
+# where the dashboards serve the simplified boundaries, figures carry this url instead of the geometry itself
+GEOJSON_ROUTE = '/geometry/india_states.geojson'
+
+# key used by the map to match geometry to the State column
+FEATURE_KEY = 'ST_NM'
+
+# simplification tolerance in degrees, a single level: nothing switches geometry when the map is zoomed
+TOLERANCE = 0.01
+
+# the map needs india_states.geojson (`python geometry.py fetch`), DASHBOARD_GEOJSON_REMOTE=1 has the browser load
+# the unsimplified gist instead, which needs internet access
+REMOTE = os.environ.get('DASHBOARD_GEOJSON_REMOTE') == '1'
+
+
+def fetch(path=GEOJSON_PATH, url=GEOJSON_URL):
+    # download the gist once so the dashboard can run offline
+    with urllib.request.urlopen(url) as response:
+        raw = response.read()
+    with open(path, 'wb') as f:
+        f.write(raw)
+    return path
+
+
+def simplify_line(points, tolerance):
+    # douglas-peucker on a polyline, keeps the first and last point
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def simplify_rings(rings, tolerance):
+    # simplified copies of closed rings that keep shared borders shared
+    # each ring is cut into arcs at junctions, the points where the rings sharing a border part ways, and every arc
+    # is simplified once, so neighbouring polygons still meet without gaps or overlaps
+    rings = [[tuple(point[:2]) for point in ring] for ring in rings]
+
+    neighbours = {}
+    for ring in rings:
+        open_ring = ring[:-1]
+        if not open_ring:
+            continue
+        for i, point in enumerate(open_ring):
+            neighbours.setdefault(point, set()).update((open_ring[i - 1], open_ring[(i + 1) % len(open_ring)]))
+    junctions = {point for point, adjacent in neighbours.items() if len(adjacent) > 2}
+
+    arcs = {}
+
+    def simplify_arc(arc):
+        # the same arc walked in either direction gives the same points
+        arc = tuple(arc)
+        canonical = min(arc, arc[::-1])
+        if canonical not in arcs:
+            arcs[canonical] = simplify_line(np.array(canonical), tolerance).tolist()
+        return arcs[canonical] if canonical == arc else arcs[canonical][::-1]
+
+    simplified = []
+    for ring in rings:
+        if len(ring) <= 4:
+            simplified.append([list(point) for point in ring])
+            continue
+        open_ring = ring[:-1]
+        cuts = [i for i, point in enumerate(open_ring) if point in junctions]
+        # start at a junction, or at the smallest point of a ring shared as a whole (e.g. an enclave)
+        first = cuts[0] if cuts else open_ring.index(min(open_ring))
+        rotated = open_ring[first:] + open_ring[:first] + [open_ring[first]]
+        cuts = [i for i, point in enumerate(rotated) if point in junctions and i > 0] or [len(rotated) - 1]
+
+        result = [list(rotated[0])]
+        start = 0
+        for end in cuts:
+            result += simplify_arc(rotated[start:end + 1])[1:]
+            start = end
+
+        # a ring needs at least 4 points (3 + closing point) to stay a polygon
+        simplified.append(result if len(result) >= 4 else [list(point) for point in ring])
+    return simplified
+
+
+def polygons(geometry):
+    # the polygons (lists of rings) of a geometry, None for other geometry types
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return None
+
+
+def simplify_geometries(geometries, tolerance):
+    # simplified copies of the geometries, simplified together so borders between them are simplified once
+    if tolerance <= 0:
+        return list(geometries)
+
+    shapes = [polygons(geometry) for geometry in geometries]
+    rings = iter(simplify_rings([ring for shape in shapes if shape is not None
+                                 for polygon in shape for ring in polygon], tolerance))
+    result = []
+    for geometry, shape in zip(geometries, shapes):
+        if shape is None:
+            result.append(geometry)
+            continue
+        coordinates = [[next(rings) for ring in polygon] for polygon in shape]
+        result.append({'type': geometry['type'],
+                       'coordinates': coordinates[0] if geometry['type'] == 'Polygon' else coordinates})
+    return result
+
+
+def geometry_bounds(geometry):
+    rings = [ring for polygon in polygons(geometry) for ring in polygon]
+    points = np.concatenate([np.asarray(ring, dtype=float)[:, :2] for ring in rings])
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def vertex_count(collection):
+    return sum(len(ring) for feature in collection['features']
+               for polygon in polygons(feature['geometry']) or [] for ring in polygon)
+
+
+class GeometryStore:
+    # state geometry loaded and simplified once, shared by every map figure
+
+    def __init__(self, collection, tolerance=TOLERANCE):
+        self.tolerance = tolerance
+        self.original = collection
+
+        # features keyed by state name
+        features = {feature['properties'][FEATURE_KEY]: feature for feature in collection['features']}
+        geometries = simplify_geometries([feature['geometry'] for feature in features.values()], tolerance)
+        self.collection = {'type': 'FeatureCollection',
+                           'features': [{'type': 'Feature', 'properties': {FEATURE_KEY: name}, 'geometry': geometry}
+                                        for name, geometry in zip(features, geometries)]}
+
+        boxes = np.array([geometry_bounds(feature['geometry']) for feature in features.values()
+                          if polygons(feature['geometry'])])
+        self.bounds = boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()
+
+    def geojson(self):
+        return self.collection
+
+    def extent(self):
+        # (lon_min, lat_min, lon_max, lat_max) of every state
+        return self.bounds
+
+
+def load(path=GEOJSON_PATH, tolerance=TOLERANCE):
+    with open(path) as f:
+        collection = json.load(f)
+    return GeometryStore(collection, tolerance)
+
+
+def load_or_url(path=GEOJSON_PATH, remote=REMOTE):
+    # None when the gist url is to be used instead, only with DASHBOARD_GEOJSON_REMOTE=1
+    if os.path.exists(path):
+        return load(path)
+    if remote:
+        return None
+    raise RuntimeError(path + ' not found, run `python geometry.py fetch` once to download it, or set '
+                       'DASHBOARD_GEOJSON_REMOTE=1 to load the map geometry from ' + GEOJSON_URL)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'fetch':
+        print('saved ' + fetch())
+    else:
+        store = load()
+        for name, collection in (('original', store.original), ('simplified', store.geojson())):
+            size = len(json.dumps(collection, separators=(',', ':')))
+            print('{}: {} vertices, {} bytes'.format(name, vertex_count(collection), size))
@@ -0,0 +1,189 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+# opt-in timing of every @app.callback, see install
+# a callback's work is split into named stages with `with stage('filter'):`, the time dash spends outside the
+# callback (mostly serializing the response) is recorded as the 'serialize' stage
+# totals are served in prometheus text format on /metrics and each response gets a Server-Timing header, /metrics
+# also has the counters of the caches, the job queue and the dataset reloads, see export
+
+ENABLED = False
+
+current = threading.local()
+lock = threading.Lock()
+
+# callback -> [count, total seconds, max seconds]
+callback_seconds = {}
+# (callback, stage) -> [count, total seconds]
+stage_seconds = {}
+# callback -> [count, total bytes]
+response_bytes = {}
+
+# name -> function returning a dict of numbers (e.g. Memo.stats), exported on /metrics as dashboard_<name>_<key>
+# string values become an info metric with the value as label, e.g. the dataset version
+sources = {}
+# keys of those dicts that only grow
+COUNTERS = {'hits', 'disk_hits', 'misses', 'submitted', 'deduplicated', 'superseded', 'cancelled', 'reloads',
+            'failures'}
+
+
+def add(table, key, *values):
+    with lock:
+        entry = table.setdefault(key, [0] + [0.0] * len(values))
+        entry[0] += 1
+        for i, value in enumerate(values):
+            entry[i + 1] += value
+
+
+@contextmanager
+def stage(name):
+    if not ENABLED or getattr(current, 'callback', None) is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.stages.append((name, time.perf_counter() - start))
+
+
+def bound(func):
+    # func run in another thread (see jobs.py) records its stages on the calling callback
+    callback, stages = getattr(current, 'callback', None), getattr(current, 'stages', None)
+    if not ENABLED or callback is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current.callback, current.stages = callback, stages
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current.callback = None
+    return wrapper
+
+
+def timed(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current.callback = func.__name__
+        current.stages = []
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stages = current.stages
+            current.callback = None
+
+            with lock:
+                entry = callback_seconds.setdefault(func.__name__, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+            for name, seconds in stages:
+                add(stage_seconds, (func.__name__, name), seconds)
+
+            if flask.has_request_context():
+                flask.g.callback = func.__name__
+                flask.g.callback_seconds = elapsed
+                flask.g.stages = stages
+    return wrapper
+
+
+def export(name, stats):
+    sources[name] = stats
+
+
+def label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus():
+    lines = ['# HELP dashboard_callback_seconds Time spent inside dash callbacks.',
+             '# TYPE dashboard_callback_seconds summary']
+    with lock:
+        for name, (count, total, longest) in sorted(callback_seconds.items()):
+            lines.append('dashboard_callback_seconds_count{{callback="{}"}} {}'.format(label(name), count))
+            lines.append('dashboard_callback_seconds_sum{{callback="{}"}} {:.6f}'.format(label(name), total))
+        lines += ['# HELP dashboard_callback_seconds_max Slowest call of each callback.',
+                  '# TYPE dashboard_callback_seconds_max gauge']
+        for name, (count, total, longest) in sorted(callback_seconds.items()):
+            lines.append('dashboard_callback_seconds_max{{callback="{}"}} {:.6f}'.format(label(name), longest))
+
+        lines += ['# HELP dashboard_stage_seconds Time spent in each stage of a callback.',
+                  '# TYPE dashboard_stage_seconds summary']
+        for (name, stage_name), (count, total) in sorted(stage_seconds.items()):
+            labels = 'callback="{}",stage="{}"'.format(label(name), label(stage_name))
+            lines.append('dashboard_stage_seconds_count{' + labels + '} ' + str(count))
+            lines.append('dashboard_stage_seconds_sum{' + labels + '} ' + '{:.6f}'.format(total))
+
+        lines += ['# HELP dashboard_response_bytes Size of serialized callback responses.',
+                  '# TYPE dashboard_response_bytes summary']
+        for name, (count, total) in sorted(response_bytes.items()):
+            lines.append('dashboard_response_bytes_count{{callback="{}"}} {}'.format(label(name), count))
+            lines.append('dashboard_response_bytes_sum{{callback="{}"}} {:.0f}'.format(label(name), total))
+
+    for name, stats in sorted(sources.items()):
+        for key, value in sorted(stats().items()):
+            metric = 'dashboard_{}_{}'.format(name, key)
+            if value is None:
+                continue
+            if isinstance(value, str):
+                lines += ['# TYPE {}_info gauge'.format(metric),
+                          '{}_info{{{}="{}"}} 1'.format(metric, key, label(value))]
+            elif key in COUNTERS:
+                lines += ['# TYPE {}_total counter'.format(metric), '{}_total {}'.format(metric, value)]
+            else:
+                lines += ['# TYPE {} gauge'.format(metric), '{} {}'.format(metric, value)]
+    return '\n'.join(lines) + '\n'
+
+
+def install(app):
+    # must run before the callbacks are registered, every later @app.callback is timed
+    global ENABLED
+    ENABLED = True
+
+    register = app.callback
+
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+
+        def wrap(func):
+            return decorator(timed(func))
+        return wrap
+
+    app.callback = callback
+    server = app.server
+
+    @server.before_request
+    def start_request():
+        flask.g.request_start = time.perf_counter()
+
+    @server.after_request
+    def finish_request(response):
+        name = flask.g.get('callback')
+        if name is None or response.direct_passthrough:
+            return response
+
+        size = len(response.get_data())
+        add(response_bytes, name, size)
+
+        # everything in the request that was not the callback itself
+        serialize = time.perf_counter() - flask.g.request_start - flask.g.callback_seconds
+        add(stage_seconds, (name, 'serialize'), serialize)
+
+        timings = ['callback;desc="{}";dur={:.2f}'.format(name, flask.g.callback_seconds * 1000)]
+        for stage_name, seconds in flask.g.stages:
+            timings.append('{};dur={:.2f}'.format(stage_name, seconds * 1000))
+        timings.append('serialize;dur={:.2f}'.format(serialize * 1000))
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return flask.Response(prometheus(), mimetype='text/plain; version=0.0.4')
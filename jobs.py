@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# background execution for the heavy selection callbacks, opt-in with DASHBOARD_ASYNC=1
+# - identical requests share one job (de-duplication across users)
+# - a newer request from the same browser for the same chart supersedes the older one: the older request stops
+#   waiting straight away and, if nobody else wants its result, the job is cancelled before it starts or at its
+#   next checkpoint()
+ASYNC = os.environ.get('DASHBOARD_ASYNC') == '1'
+
+
+class Superseded(Exception):
+    # the browser has asked for something newer, the response would be thrown away
+    pass
+
+
+class Cancelled(Exception):
+    # raised inside a job that no request is waiting for any more
+    pass
+
+
+class Job:
+
+    def __init__(self):
+        self.waiters = 0
+        self.cancelled = False
+        self.future = None
+
+
+current = threading.local()
+
+
+def checkpoint():
+    # call between stages of a long computation, stops it when its result is no longer wanted
+    job = getattr(current, 'job', None)
+    if job is not None and job.cancelled:
+        raise Cancelled()
+
+
+class JobQueue:
+
+    def __init__(self, workers=4, poll=0.02, enabled=True):
+        self.enabled = enabled
+        self.poll = poll
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='dashboard-job') if enabled else None
+        self.jobs = {}
+        # (client, kind) -> number of its newest request still waiting, removed when that one returns
+        self.latest = {}
+        # numbers grow across all slots, so a slot emptied and filled again never reuses one
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.superseded = 0
+        self.cancelled = 0
+
+    def execute(self, key, job, compute):
+        current.job = job
+        try:
+            if job.cancelled:
+                raise Cancelled()
+            return compute()
+        except Cancelled:
+            with self.lock:
+                self.cancelled += 1
+            raise
+        finally:
+            current.job = None
+            with self.lock:
+                if self.jobs.get(key) is job:
+                    del self.jobs[key]
+
+    def run(self, client, kind, key, compute):
+        # result of compute for key, raises Superseded when client asks for a newer `kind` result meanwhile
+        if not self.enabled:
+            return compute()
+
+        slot = (client, kind)
+        with self.lock:
+            self.requests += 1
+            generation = self.requests
+            self.latest[slot] = generation
+
+            job = self.jobs.get(key)
+            if job is None or job.cancelled:
+                job = Job()
+                self.jobs[key] = job
+                job.future = self.executor.submit(self.execute, key, job, compute)
+                self.submitted += 1
+            else:
+                self.deduplicated += 1
+            job.waiters += 1
+
+        try:
+            while True:
+                try:
+                    return job.future.result(timeout=self.poll)
+                except FutureTimeout:
+                    pass
+                if client is not None and self.latest.get(slot) != generation:
+                    with self.lock:
+                        self.superseded += 1
+                    raise Superseded()
+        finally:
+            with self.lock:
+                if self.latest.get(slot) == generation:
+                    del self.latest[slot]
+                job.waiters -= 1
+                if job.waiters == 0 and not job.future.done():
+                    job.cancelled = True
+                    job.future.cancel()
+
+    def stats(self):
+        with self.lock:
+            return {'running': len(self.jobs),
+                    'clients': len(self.latest),
+                    'submitted': self.submitted,
+                    'deduplicated': self.deduplicated,
+                    'superseded': self.superseded,
+                    'cancelled': self.cancelled}
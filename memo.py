@@ -0,0 +1,99 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def selection_key(kind, states=(), *args):
+    # canonical cache key: the chart kind, the selected states in sorted order, then the other inputs
+    return (kind, tuple(sorted(set(states)))) + tuple(args)
+
+
+class Memo:
+    # size bounded LRU of callback results, optionally backed by pickles in a directory
+    # so results survive restarts and are shared by every worker pointed at the same directory
+
+    def __init__(self, maxsize=512, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + '.pickle')
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        value = self.read(key)
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            value = compute()
+            self.write(key, value)
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def write(self, key, value):
+        if self.directory is None:
+            return
+        # write to a file of our own, then rename, so no other worker or thread reads or replaces half a file
+        # a failed write only costs the disk copy, the value is still returned and kept in memory
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.path(key))
+        except (OSError, pickle.PickleError, TypeError, AttributeError) as error:
+            print('warning: could not write the memo entry to ' + self.directory + ': ' + repr(error))
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        if self.directory is not None:
+            # workers sharing the directory clear it at the same time, files already gone are fine
+            for name in os.listdir(self.directory):
+                if name.endswith('.pickle'):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self):
+        total = self.hits + self.disk_hits + self.misses
+        return {'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / total if total else 0.0}
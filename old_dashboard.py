@@ -1,4 +1,3 @@
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import dash
@@ -7,12 +6,26 @@ import dash_bootstrap_components as dbc
 import dash_html_components as html
 from dash.dependencies import Input, Output
 
+import api
+import data_store
+import geometry
+from correlation import Correlations
+from cube import Cube
+from selection import selected_locations
+
 # general dash tutorial --> https://www.youtube.com/watch?v=hSPmj7mK6ng
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
-# read data set
-dff = pd.read_csv('year_data/2012.csv')
+# read data set once, the year and state views below are slices of it
+wide = data_store.load_wide()
+dff = wide[wide['Year'] == 2012]
+# state x year sums of every column family, for the data by charts
+cube = Cube(wide)
+# correlations of Total with every feature, for the heatmap and risk rating
+correlations = Correlations(cube)
+geo = geometry.load_or_url()
+geojson_url = geometry.GEOJSON_URL if geo is None else api.install_geometry(app.server, geo.geojson())
 
 # dash components and html goes here
 app.layout = html.Div([
@@ -93,9 +106,7 @@ app.layout = html.Div([
                 children=[
                     dcc.Dropdown(id='data_by_select',
                                  value='profession',
-                                 options=[{'label': 'Data by Profession', 'value': 'profession'},
-                                          {'label': 'Data by Cause', 'value': 'cause'},
-                                          {'label': 'Data by Gender', 'value': 'gender'}, ],
+                                 options=cube.families.options(),
                                  className='col-3', clearable=False, searchable=False
                                  )
                 ]
@@ -123,16 +134,13 @@ app.layout = html.Div([
 def update_graph(slider_select):
     container = "The year chosen by user was: {}".format(slider_select)
 
-    dff = pd.read_csv('year_data/' + str(slider_select) + '.csv')
+    dff = wide[wide['Year'] == slider_select]
 
     # Plotly Express
     fig = px.choropleth(
         data_frame=dff,
-        # api for map of india
-        # found here https://stackoverflow.com/questions/60910962/is-there-any-way-to-draw-india-map-in-plotly
-        geojson="https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw"
-                "/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson",
-        featureidkey='properties.ST_NM',
+        geojson=geojson_url,
+        featureidkey='properties.' + geometry.FEATURE_KEY,
         locations='State',
         color='Total',  # z
         # cluster
@@ -223,85 +231,34 @@ def select_data(clicked, selected):
                Input(component_id='suicide_map', component_property='clickData'),
                Input(component_id='suicide_map', component_property='selectedData')])
 def feature_matrix(feature, clicked, selected):
-    try:
-        if selected is None:
-            selected = clicked
-
-        locations = []
-        for point in selected['points']:
-            for attr, value in point.items():
-                if attr == 'location':
-                    locations.append(str(value))
-
-        # combine all select states into one df series
-        # this is what the figures will use for data
-        if len(locations) == 1:
-            selected_states = pd.DataFrame()
-            for location in locations:
-                df = pd.read_csv('state_data/' + str(location) + '.csv')
-                selected_states = selected_states.append(df, ignore_index=True)
-        else:
-            locations = []
-            for point in selected['points']:
-                for attr, value in point.items():
-                    if attr == 'location':
-                        locations.append(str(value))
-
-            selected_states = dff[dff['State'].isin(locations)]
-
-        label = ''
-        if 'Professional_Profile_' in feature:
-            label = feature[21:]
-        elif 'Education_Status_' in feature:
-            label = feature[17:]
-        elif 'Social_Status_' in feature:
-            label = feature[14:]
-
-        # find correlation matrix
-        corr = selected_states[['Total', feature]].corr(method='pearson')
-        # visualize correlation matrix
-        corr_map = go.Figure()
-        corr_map.add_trace(go.Heatmap(x=['Total', label], y=['Total', label], z=corr, colorscale='reds'))
-        corr_map.update_layout(title_text='Correlation Heatmap')
-
-        risk = corr.iloc[0, 1]
-
-        if risk >= .80:
-            risk_rating = 'This group is at high risk.'
-        elif (risk < .80) and (risk >= 0.50):
-            risk_rating = 'This group is at moderate risk.'
-        else:
-            risk_rating = 'This group is at a low risk.'
-        return corr_map, risk_rating
-
+    locations = selected_locations(clicked, selected)
     # init data
-    except TypeError:
-        selected_states = pd.read_csv('state_data/Maharashtra.csv')
-
-        label = ''
-        if 'Professional_Profile_' in feature:
-            label = feature[21:]
-        elif 'Education_Status_' in feature:
-            label = feature[17:]
-        elif 'Social_Status_' in feature:
-            label = feature[14:]
-
-        # find correlation matrix
-        corr = selected_states[['Total', feature]].corr(method='pearson')
-        # visualize correlation matrix
-        corr_map = go.Figure()
-        corr_map.add_trace(go.Heatmap(x=['Total', label], y=['Total', label], z=corr, colorscale='reds'))
-        corr_map.update_layout(title_text='Correlation Heatmap')
-
-        risk = corr.iloc[0, 1]
-
-        if risk >= .80:
-            risk_rating = 'This group is at high risk.'
-        elif (risk < .80) and (risk >= 0.50):
-            risk_rating = 'This group is at moderate risk.'
-        else:
-            risk_rating = 'This group is at a low risk.'
-        return corr_map, risk_rating
+    if not locations:
+        locations = ['Maharashtra']
+
+    label = ''
+    if 'Professional_Profile_' in feature:
+        label = feature[21:]
+    elif 'Education_Status_' in feature:
+        label = feature[17:]
+    elif 'Social_Status_' in feature:
+        label = feature[14:]
+
+    # correlation of Total with the feature: over the years for one state, across the states in 2012 otherwise
+    risk = correlations.get(locations, 2012, feature)
+    corr = [[1.0, risk], [risk, 1.0]]
+    # visualize correlation matrix
+    corr_map = go.Figure()
+    corr_map.add_trace(go.Heatmap(x=['Total', label], y=['Total', label], z=corr, colorscale='reds'))
+    corr_map.update_layout(title_text='Correlation Heatmap')
+
+    if risk >= .80:
+        risk_rating = 'This group is at high risk.'
+    elif (risk < .80) and (risk >= 0.50):
+        risk_rating = 'This group is at moderate risk.'
+    else:
+        risk_rating = 'This group is at a low risk.'
+    return corr_map, risk_rating
 
 
 @app.callback(Output(component_id='data_by_figure', component_property='figure'),
@@ -309,147 +266,29 @@ def feature_matrix(feature, clicked, selected):
                Input(component_id='suicide_map', component_property='clickData'),
                Input(component_id='suicide_map', component_property='selectedData')])
 def data_by(figure_select, clicked, selected):
-    try:
-        if selected is None:
-            selected = clicked
-
-        locations_str = ['State(s) Selected: ']
-        locations = []
-        for point in selected['points']:
-            for attr, value in point.items():
-                if attr == 'location':
-                    locations_str.append(str(value) + ", ")
-                    locations.append(str(value))
-
-        # combine all select states into one df series
-        # this is what the figures will use for data
-        selected_states = dff[dff['State'].isin(locations)]
-
-        if figure_select == 'profession':
-            # get all professions
-            professions = []
-            for col in selected_states.columns:
-                if 'Professional_Profile_' in col:
-                    professions.append(col)
-
-            # slice the profession strings so they just say the professions
-            professions_sliced = []
-            for profession in professions:
-                professions_sliced.append(profession[21:])
-
-            # y values for professions
-            profession_values = []
-            for profession in professions:
-                profession_values.append(selected_states[profession].sum())
-
-            # chart for profession
-            professions_bar = go.Figure()
-            professions_bar.add_trace(go.Bar(x=professions_sliced, y=profession_values,
-                                      marker=dict(color=profession_values, colorscale='reds')))
-            professions_bar.update_layout(title_text='Data by Profession', width=1200)
-
-            return professions_bar
-
-        elif figure_select == 'cause':
-            # get all causes
-            causes = []
-            for column in selected_states.columns:
-                if 'Causes_' in column:
-                    causes.append(column)
-
-            # slice the causes strings so they just say the causes
-            causes_sliced = []
-            for cause in causes:
-                causes_sliced.append(cause[7:])
-
-            # y value for causes
-            causes_values = []
-            for cause in causes:
-                causes_values.append(selected_states[cause].sum())
-
-            # chart for causes
-            causes_bar = go.Figure()
-            causes_bar.add_trace(go.Bar(x=causes_sliced, y=causes_values,
-                                        marker=dict(color=causes_values, colorscale='reds')))
-            causes_bar.update_layout(title_text='Data by Cause', width=1200)
-
-            return causes_bar
-
-        else:  # gender
-            gender_bar = go.Figure()
-            gender_bar.add_trace(
-                go.Bar(y=['Gender'], x=[selected_states['Female'].sum()], name='Female', orientation='h',
-                       marker=dict(color=[selected_states['Female'].sum()], colorscale='reds')))
-            gender_bar.add_trace(go.Bar(y=['Gender'], x=[selected_states['Male'].sum()], name='Male', orientation='h',
-                                        marker=dict(color=[selected_states['Male'].sum()], colorscale='reds')))
-            gender_bar.update_layout(title_text='Data by Gender', width=1200)
-
-            return gender_bar
-
+    locations = selected_locations(clicked, selected)
     # init figure
-    except TypeError:
-        temp = dff[dff['State'] == 'Maharashtra']
-
-        if figure_select == 'profession':
-            # get all professions
-            professions = []
-            for col in temp.columns:
-                if 'Professional_Profile_' in col:
-                    professions.append(col)
-
-            # slice the profession strings so they just say the professions
-            professions_sliced = []
-            for profession in professions:
-                professions_sliced.append(profession[21:])
-
-            # y values for professions
-            profession_values = []
-            for profession in professions:
-                profession_values.append(temp[profession].sum())
-
-            # chart for profession
-            professions_bar = go.Figure()
-            professions_bar.add_trace(go.Bar(x=professions_sliced, y=profession_values,
-                                      marker=dict(color=profession_values, colorscale='reds')))
-            professions_bar.update_layout(title_text='Data by Profession', width=1200)
-
-            return professions_bar
-
-        elif figure_select == 'cause':
-            # get all causes
-            causes = []
-            for column in temp.columns:
-                if 'Causes_' in column:
-                    causes.append(column)
-
-            # slice the causes strings so they just say the causes
-            causes_sliced = []
-            for cause in causes:
-                causes_sliced.append(cause[7:])
-
-            # y value for causes
-            causes_values = []
-            for cause in causes:
-                causes_values.append(temp[cause].sum())
-
-            # chart for causes
-            causes_bar = go.Figure()
-            causes_bar.add_trace(go.Bar(x=causes_sliced, y=causes_values,
-                                        marker=dict(color=causes_values, colorscale='reds')))
-            causes_bar.update_layout(title_text='Data by Cause', width=1200)
-
-            return causes_bar
-
-        else:  # gender
-            gender_bar = go.Figure()
-            gender_bar.add_trace(
-                go.Bar(y=['Gender'], x=[temp['Female'].sum()], name='Female', orientation='h',
-                       marker=dict(color=[temp['Female'].sum()], colorscale='reds')))
-            gender_bar.add_trace(go.Bar(y=['Gender'], x=[temp['Male'].sum()], name='Male', orientation='h',
-                                        marker=dict(color=[temp['Male'].sum()], colorscale='reds')))
-            gender_bar.update_layout(title_text='Data by Gender', width=1200)
-
-            return gender_bar
+    if locations is None:
+        locations = ['Maharashtra']
+
+    if figure_select not in {family.key for family in cube.families.charted()}:
+        figure_select = 'gender'
+    family = cube.families[figure_select]
+    # summed 2012 counts of the family's columns for the selected states
+    labels, values = cube.query(family.key, locations, 2012)
+
+    if family.key == 'gender':
+        gender_bar = go.Figure()
+        for label, value in zip(labels, values):
+            gender_bar.add_trace(go.Bar(y=['Gender'], x=[value], name=label, orientation='h',
+                                        marker=dict(color=[value], colorscale='reds')))
+        gender_bar.update_layout(title_text='Data by Gender', width=1200)
+        return gender_bar
+
+    family_bar = go.Figure()
+    family_bar.add_trace(go.Bar(x=labels, y=values, marker=dict(color=values, colorscale='reds')))
+    family_bar.update_layout(title_text='Data by ' + family.title, width=1200)
+    return family_bar
 
 
 if __name__ == '__main__':
@@ -0,0 +1,45 @@
+import hashlib
+import json
+
+try:
+    from dash import Patch
+except ImportError:
+    # dash < 2.9 has no partial updates, callbacks then always send the whole figure
+    Patch = None
+
+
+def digest(values):
+    encoded = json.dumps(values, default=lambda value: value.tolist() if hasattr(value, 'tolist') else str(value))
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+def title(fig):
+    text = fig.get('layout', {}).get('title', {})
+    return text.get('text') if isinstance(text, dict) else text
+
+
+def figure_state(fig):
+    # what the browser is showing, kept next to the figure in a dcc.Store
+    return {'traces': [[trace.get('type'), trace.get('name'), digest(trace.get('x'))] for trace in fig.get('data', [])],
+            'title': title(fig)}
+
+
+def figure_update(fig, previous):
+    # the whole figure when its traces differ from what the browser has, otherwise a Patch with only the
+    # data that changed: x when it differs, y, marker colours and the title
+    state = figure_state(fig)
+    if Patch is None or previous is None or not state['traces'] or \
+            [trace[:2] for trace in state['traces']] != [trace[:2] for trace in previous['traces']]:
+        return fig, state
+
+    patch = Patch()
+    for i, (trace, new, old) in enumerate(zip(fig['data'], state['traces'], previous['traces'])):
+        if new[2] != old[2]:
+            patch['data'][i]['x'] = trace.get('x')
+        patch['data'][i]['y'] = trace.get('y')
+        color = trace.get('marker', {}).get('color')
+        if color is not None:
+            patch['data'][i]['marker']['color'] = color
+    if state['title'] != previous['title']:
+        patch['layout']['title']['text'] = state['title']
+    return patch, state
@@ -0,0 +1,125 @@
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import data_store
+
+# the steps of india_suicide_dataset_preprocessing.ipynb, plus the long format data.csv the dashboard needs
+# a stage is skipped when the content hashes of its inputs match the last run and its outputs still exist
+STATE_FILE = '.pipeline_state.json'
+
+RESHAPED_CSV = 'Suicide_Data_Reshaped.csv'
+# the original Kaggle "Suicides in India 2001-2012" file, one row per state/year/type/gender/age group
+RAW_CSV = 'Suicides in India 2001-2012.csv'
+
+# columns that are split in two by a typo in the source data, (dropped, kept)
+DUPLICATE_COLUMNS = [('Causes_Bankruptcy or Sudden change in Economic',
+                      'Causes_Bankruptcy or Sudden change in Economic Status'),
+                     ('Causes_Not having Children(Barrenness/Impotency',
+                      'Causes_Not having Children (Barrenness/Impotency')]
+
+# bump a stage's version when its transform changes so old outputs are rebuilt
+VERSIONS = {'processed': 1, 'long': 1, 'store': 1}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_processed(reshaped_path=RESHAPED_CSV, output_path=data_store.WIDE_CSV):
+    df = pd.read_csv(reshaped_path)
+
+    # the duplicated columns are both missing values, but together they are a complete column
+    for dropped, kept in DUPLICATE_COLUMNS:
+        df[kept] = df[kept].fillna(df[dropped])
+    df = df.drop(columns=[dropped for dropped, kept in DUPLICATE_COLUMNS])
+
+    # missing counts are where 0 suicides are meant to be
+    numeric = df.select_dtypes(include='number').columns
+    df[numeric] = df[numeric].fillna(0)
+
+    df.to_csv(output_path)
+    return [output_path]
+
+
+def build_long(raw_path=RAW_CSV, output_path=data_store.LONG_CSV):
+    data = pd.read_csv(raw_path)
+
+    # use the same type names as the merged columns of processed_suicide_data.csv
+    for dropped, kept in DUPLICATE_COLUMNS:
+        code, dropped_type = dropped.split('_', 1)
+        kept_type = kept.split('_', 1)[1]
+        mask = (data['Type_code'] == code) & (data['Type'] == dropped_type)
+        data.loc[mask, 'Type'] = kept_type
+
+    data['Total'] = data['Total'].fillna(0).astype(int)
+    data.to_csv(output_path, index=False)
+    return [output_path]
+
+
+def build_store(*paths):
+    return data_store.convert()
+
+
+# name -> (inputs, outputs, build)
+STAGES = {
+    'processed': ([RESHAPED_CSV], [data_store.WIDE_CSV], build_processed),
+    'long': ([RAW_CSV], [data_store.LONG_CSV], build_long),
+    'store': ([data_store.WIDE_CSV, data_store.LONG_CSV],
+              [data_store.store_path(data_store.WIDE_CSV), data_store.store_path(data_store.LONG_CSV)],
+              build_store),
+}
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def run(stages=None, force=False, state_path=STATE_FILE):
+    state = load_state(state_path)
+    for name in stages or list(STAGES):
+        inputs, outputs, build = STAGES[name]
+
+        missing = [path for path in inputs if not os.path.exists(path)]
+        if missing:
+            print('{}: skipped, missing {}'.format(name, ', '.join(missing)))
+            continue
+        if name == 'store' and not data_store.HAS_PYARROW:
+            print('store: skipped, pyarrow is not installed')
+            continue
+
+        fingerprint = {'version': VERSIONS[name], 'inputs': {path: file_hash(path) for path in inputs}}
+        if not force and state.get(name) == fingerprint and all(os.path.exists(path) for path in outputs):
+            print('{}: up to date'.format(name))
+            continue
+
+        for path in build(*inputs):
+            print('{}: wrote {}'.format(name, path))
+        state[name] = fingerprint
+        save_state(state, state_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the dashboard data files from the source csv files.')
+    parser.add_argument('stages', nargs='*', help='stages to run ({}), all by default'.format(', '.join(STAGES)))
+    parser.add_argument('--force', action='store_true', help='rebuild even if the inputs have not changed')
+    args = parser.parse_args()
+    for stage in args.stages:
+        if stage not in STAGES:
+            parser.error('unknown stage ' + stage)
+    run(args.stages, args.force)
@@ -0,0 +1,90 @@
+import numpy as np
+
+# states whose names start with this are sums of other states ('Total (All India)' ...), never ranked
+AGGREGATE_PREFIX = 'Total'
+
+# count: the value in the year, change: difference to the year before, rate: relative change to the year before
+METRICS = ('count', 'change', 'rate')
+
+# entries kept per year in the index, larger k is answered from the full arrays
+K = 10
+
+
+def top_k(values, k, largest=True):
+    # positions of the k largest (or smallest) values, best first, nan is skipped
+    # argpartition finds them in linear time, only those k are sorted
+    finite = np.flatnonzero(np.isfinite(values))
+    keys = -values[finite] if largest else values[finite]
+    k = min(k, len(finite))
+    if k == 0:
+        return np.zeros(0, dtype=np.intp)
+    part = np.argpartition(keys, k - 1)[:k]
+    return finite[part[np.argsort(keys[part], kind='stable')]]
+
+
+def changes(values, before):
+    # (change, rate) of values against before, rate is nan where before is 0
+    change = values - before
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(before != 0, change / before, np.nan)
+    return change, rate
+
+
+class Rankings:
+    # top k states (by Total) and categories of every family (summed over the states) for every year and metric,
+    # ranked once from the cube
+
+    def __init__(self, cube, k=K):
+        self.cube = cube
+        self.k = k
+        self.years = list(cube.years)
+        self.year_ids = dict(cube.year_ids)
+        states = [i for i, state in enumerate(cube.states) if not state.startswith(AGGREGATE_PREFIX)]
+
+        # kind -> (labels, years x entities counts)
+        self.entities = {'states': ([cube.states[i] for i in states],
+                                    cube.values[states][:, :, cube.families['total'].block.start].T.astype(np.float64))}
+        for family in cube.families.charted():
+            counts = cube.values[states][:, :, family.block].sum(axis=0).astype(np.float64)
+            self.entities[family.key] = (family.labels, counts)
+
+        # (kind, metric) -> years x entities values, the first year has no change
+        self.metrics = {}
+        for kind, (labels, counts) in self.entities.items():
+            before = np.vstack([np.full((1, counts.shape[1]), np.nan), counts[:-1]])
+            change, rate = changes(counts, before)
+            self.metrics[kind, 'count'] = counts
+            self.metrics[kind, 'change'] = change
+            self.metrics[kind, 'rate'] = rate
+
+        # (kind, metric, largest) -> positions of the top k per year
+        self.index = {}
+        for (kind, metric), values in self.metrics.items():
+            for largest in (True, False):
+                self.index[kind, metric, largest] = [top_k(row, k, largest) for row in values]
+
+    def top(self, kind, metric, year, k=K, largest=True):
+        # [(label, value)] of the k entities with the largest (or smallest) metric in year
+        labels = self.entities[kind][0]
+        values = self.metrics[kind, metric]
+        year_id = self.year_ids.get(year)
+        if year_id is None:
+            return []
+        if k <= self.k:
+            positions = self.index[kind, metric, largest][year_id][:k]
+        else:
+            positions = top_k(values[year_id], k, largest)
+        return [(labels[i], float(values[year_id, i])) for i in positions]
+
+    def between(self, kind, metric, start, end, k=K, largest=True):
+        # like top, with change and rate from start to end instead of from the year before, count is end's
+        labels, counts = self.entities[kind]
+        start_id, end_id = self.year_ids.get(start), self.year_ids.get(end)
+        if start_id is None or end_id is None:
+            return []
+        if metric == 'count':
+            values = counts[end_id]
+        else:
+            change, rate = changes(counts[end_id], counts[start_id])
+            values = change if metric == 'change' else rate
+        return [(labels[i], float(values[i])) for i in top_k(values, k, largest)]
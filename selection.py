@@ -0,0 +1,24 @@
+def selected_locations(clicked, selected):
+    # state names of a map click or lasso/box selection, the selection wins when both are set
+    # returns None when nothing has been selected yet
+    if selected is None:
+        selected = clicked
+    if selected is None:
+        return None
+
+    states = []
+    for point in selected.get('points', []):
+        if 'location' in point:
+            states.append(str(point['location']))
+    return states
+
+
+def to_store(states, state_ids):
+    # sorted names of the states with data for the browser store
+    # names rather than positions in cube.states, which shift when a reload adds or drops a state
+    return sorted(set(state for state in states if state in state_ids), key=state_ids.get)
+
+
+def from_store(stored, state_ids):
+    # states dropped by a reload since the selection was made are left out
+    return [state for state in stored if state in state_ids]
@@ -0,0 +1,117 @@
+import base64
+import json
+import os
+import re
+
+import numpy as np
+
+# figure payload encodings, both opt-in
+#   DASHBOARD_TYPED_ARRAYS=1  numeric trace arrays are sent as base64 typed arrays ({'dtype': 'i2', 'bdata': ...})
+#                             instead of json number lists, needs plotly.js >= 2.28 in the browser, install leaves
+#                             it off with a warning when dash serves an older one (dash 2.9 ships 2.20)
+#   DASHBOARD_FAST_JSON=1     dash serializes responses with orjson instead of the standard json module
+TYPED_ARRAYS = os.environ.get('DASHBOARD_TYPED_ARRAYS') == '1'
+FAST_JSON = os.environ.get('DASHBOARD_FAST_JSON') == '1'
+# first plotly.js release that decodes {'dtype', 'bdata'} arrays, checked by install
+TYPED_ARRAYS_PLOTLYJS = (2, 28)
+
+# shorter arrays are not worth the base64 overhead
+MIN_LENGTH = 8
+
+# keys whose values plotly.js reads as plain json, e.g. geojson coordinates
+SKIP = {'geojson', 'customdata', 'template'}
+
+INT_TYPES = [('i1', np.int8), ('u1', np.uint8), ('i2', np.int16), ('u2', np.uint16), ('i4', np.int32),
+             ('u4', np.uint32)]
+DTYPES = dict(INT_TYPES + [('f4', np.float32), ('f8', np.float64)])
+
+
+def typed_array(values):
+    # {'dtype', 'bdata'} for a 1d numeric array, None when it is not one
+    array = np.asarray(values)
+    if array.ndim != 1 or len(array) < MIN_LENGTH or array.dtype.kind not in 'iuf':
+        return None
+
+    if array.dtype.kind in 'iu' or (np.isfinite(array).all() and (array == np.round(array)).all()):
+        low, high = array.min(), array.max()
+        for name, dtype in INT_TYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return {'dtype': name, 'bdata': base64.b64encode(array.astype(dtype).tobytes()).decode('ascii')}
+    return {'dtype': 'f8', 'bdata': base64.b64encode(array.astype(np.float64).tobytes()).decode('ascii')}
+
+
+def is_numeric_list(values):
+    return isinstance(values, (list, tuple)) and len(values) >= MIN_LENGTH and \
+        all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values)
+
+
+def compact(obj):
+    # copy of a figure dict with every long numeric array as a typed array
+    if isinstance(obj, dict):
+        return {key: value if key in SKIP else compact(value) for key, value in obj.items()}
+    if isinstance(obj, np.ndarray) or is_numeric_list(obj):
+        encoded = typed_array(obj)
+        if encoded is not None:
+            return encoded
+    if isinstance(obj, (list, tuple)):
+        return [compact(value) for value in obj]
+    return obj
+
+
+def plain(obj):
+    # copy of a figure dict with every array as a json list
+    # plotly >= 6 writes numpy arrays as typed arrays by itself, e.g. the z values of plotly express figures
+    if isinstance(obj, dict):
+        if set(obj) == {'dtype', 'bdata'}:
+            return np.frombuffer(base64.b64decode(obj['bdata']), dtype=DTYPES[obj['dtype']]).tolist()
+        return {key: value if key in SKIP else plain(value) for key, value in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (list, tuple)):
+        return [plain(value) for value in obj]
+    return obj
+
+
+def figure_dict(fig):
+    # what the figure builders return, typed arrays only when enabled
+    if TYPED_ARRAYS:
+        return compact(fig.to_dict())
+    return plain(fig.to_dict())
+
+
+def plotlyjs_version():
+    # (major, minor) of the plotly.js dash serves to the browser, None when it cannot be told
+    try:
+        import dash
+        with open(os.path.join(os.path.dirname(dash.__file__), 'dcc', 'package-info.json')) as f:
+            version = json.load(f)['dependencies']['plotly.js-dist-min']
+    except (ImportError, OSError, KeyError, ValueError):
+        return None
+    parts = re.findall(r'\d+', version)
+    return (int(parts[0]), int(parts[1])) if len(parts) >= 2 else None
+
+
+def install():
+    # typed arrays stay off unless the browser can decode them, blank charts are worse than larger payloads
+    global TYPED_ARRAYS
+    if TYPED_ARRAYS:
+        version = plotlyjs_version()
+        if version is None or version < TYPED_ARRAYS_PLOTLYJS:
+            print('warning: DASHBOARD_TYPED_ARRAYS is set but dash serves plotly.js ' +
+                  ('of unknown version' if version is None else '{}.{}'.format(*version)) +
+                  ', typed arrays need {}.{} or newer and stay off'.format(*TYPED_ARRAYS_PLOTLYJS))
+            TYPED_ARRAYS = False
+
+    # plotly's json helpers, which dash uses for callback responses, switch to orjson when it is installed
+    if not FAST_JSON:
+        return False
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        print('warning: DASHBOARD_FAST_JSON is set but orjson is not installed')
+        return False
+
+    import plotly.io as pio
+    pio.json.config.default_engine = 'orjson'
+    return True
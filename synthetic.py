@@ -0,0 +1,149 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+# statistically similar stand-ins for processed_suicide_data.csv and data.csv at district and monthly granularity
+# every state is split into districts and every year into months, counts are poisson draws whose means follow the
+# state's average mix of each column in the real data, its share between districts, a seasonal curve and the
+# national growth between 2001 and 2012
+# the column schema is unchanged apart from extra District and Month columns, so the loaders in data_store.py,
+# the dashboard (DASHBOARD_WIDE_CSV / DASHBOARD_LONG_CSV) and the benchmarks can all read the output
+
+# aggregate rows of the real data, not states
+AGGREGATES = ['Total (All India)', 'Total (States)', 'Total (Uts)']
+
+# relative suicides per month, peaking in the summer months
+SEASON = np.array([0.90, 0.88, 0.97, 1.06, 1.14, 1.10, 1.04, 1.00, 0.98, 0.99, 0.97, 0.97])
+
+
+def annual_growth(df):
+    # average yearly growth of the national total over the real years, and the year the averages are centred on
+    totals = df[~df['State'].isin(AGGREGATES)].groupby('Year')['Total'].sum()
+    years = totals.index.to_numpy(dtype=float)
+    slope = np.polyfit(years - years.mean(), np.log(totals.to_numpy(dtype=float)), 1)[0]
+    return np.exp(slope), years.mean()
+
+
+def district_weights(rng, n_states, districts):
+    # how each state's counts are shared between its districts
+    return rng.dirichlet(np.ones(districts) * 2.0, size=n_states)
+
+
+def synthetic_wide(df, years, districts=30, seed=0):
+    # yields one frame per year with states x districts x 12 rows
+    rng = np.random.default_rng(seed)
+    df = df[~df['State'].isin(AGGREGATES)]
+    counts = [col for col in df.columns if col not in ('State', 'Year') and pd.api.types.is_numeric_dtype(df[col])]
+    family_totals = [col for col in counts if col.startswith('Total_')]
+    draws = [col for col in counts if col not in family_totals and col != 'Total']
+
+    means = df.groupby('State', observed=True)[draws].mean()
+    states = means.index.astype(str).to_numpy()
+    growth, centre_year = annual_growth(df)
+    weights = district_weights(rng, len(states), districts)
+
+    # states x districts x months scale of the yearly state means
+    scale = weights[:, :, None] * (SEASON / SEASON.sum())[None, None, :]
+    rows = len(states) * districts * 12
+    state_col = np.repeat(states, districts * 12)
+    district_col = np.array([state + ' District ' + str(d + 1) for state in states for d in range(districts)
+                             for _ in range(12)])
+    month_col = np.tile(np.arange(1, 13, dtype=np.int8), len(states) * districts)
+
+    for year in years:
+        factor = growth ** (year - centre_year)
+        mean = means.to_numpy()[:, None, None, :] * scale[:, :, :, None] * factor
+        values = rng.poisson(mean.reshape(rows, len(draws))).astype(np.int32)
+
+        frame = pd.DataFrame(values, columns=draws)
+        frame.insert(0, 'State', state_col)
+        frame.insert(1, 'District', district_col)
+        frame.insert(2, 'Year', np.int16(year))
+        frame.insert(3, 'Month', month_col)
+        # the real file has Total = Male + Female and a Total_<family> column per family
+        frame.insert(4, 'Total', frame['Male'] + frame['Female'])
+        for col in family_totals:
+            prefix = col[len('Total_'):] + '_'
+            frame[col] = frame[[c for c in draws if c.startswith(prefix)]].sum(axis=1).astype(np.int32)
+        yield frame[['State', 'District', 'Year', 'Month'] + [col for col in df.columns if col in counts]]
+
+
+def synthetic_long(data, years, districts=30, seed=0):
+    # yields one frame per year shaped like data.csv, with District and Month columns
+    rng = np.random.default_rng(seed)
+    data = data[~data['State'].isin(AGGREGATES)]
+    keys = ['Type_code', 'Type', 'Gender', 'Age_group']
+    means = data.groupby(['State'] + keys, observed=True)['Total'].mean().reset_index()
+    means = means[means['Total'] > 0]
+
+    growth, centre_year = annual_growth(data)
+
+    states = means['State'].astype(str).unique()
+    state_ids = {state: i for i, state in enumerate(states)}
+    weights = district_weights(rng, len(states), districts)
+    state_index = means['State'].astype(str).map(state_ids).to_numpy()
+
+    # every (series, district, month) combination
+    n = len(means)
+    series = np.repeat(np.arange(n), districts * 12)
+    district = np.tile(np.repeat(np.arange(districts), 12), n)
+    month = np.tile(np.arange(12), n * districts)
+    base = means['Total'].to_numpy()[series] * weights[state_index[series], district] * (SEASON / SEASON.sum())[month]
+
+    frame = means.iloc[series][['State'] + keys].reset_index(drop=True)
+    frame.insert(1, 'District', frame['State'].astype(str) + ' District ' + (district + 1).astype(str))
+    frame.insert(2, 'Month', (month + 1).astype(np.int8))
+    for year in years:
+        out = frame.copy()
+        out.insert(2, 'Year', np.int16(year))
+        out['Total'] = rng.poisson(base * growth ** (year - centre_year)).astype(np.int32)
+        yield out
+
+
+def write(frames, path):
+    # frames are written one at a time so millions of rows never sit in memory together
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is not None:
+            writer.close()
+        return
+
+    offset = 0
+    for i, frame in enumerate(frames):
+        # keep the leading index column of processed_suicide_data.csv, the loaders expect it
+        frame.index = np.arange(offset, offset + len(frame))
+        offset += len(frame)
+        frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate district/monthly synthetic data with the real schema.')
+    parser.add_argument('kind', choices=['wide', 'long'])
+    parser.add_argument('output', help='.csv or .parquet path')
+    parser.add_argument('--start', type=int, default=2001)
+    # the long format has ~20k series per year, so it gets fewer years and districts by default
+    parser.add_argument('--years', type=int, help='number of years, 100 for wide and 12 for long by default')
+    parser.add_argument('--districts', type=int, help='districts per state, 30 for wide and 4 for long by default')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.kind == 'wide':
+        years = range(args.start, args.start + (args.years or 100))
+        frames = synthetic_wide(data_store.load_wide(), years, args.districts or 30, args.seed)
+    else:
+        years = range(args.start, args.start + (args.years or 12))
+        frames = synthetic_long(data_store.load_long(), years, args.districts or 4, args.seed)
+    write(frames, args.output)
+    print('wrote ' + args.output + ' ({:.1f} MB)'.format(os.path.getsize(args.output) / 1e6))
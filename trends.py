@@ -0,0 +1,15 @@
+import numpy as np
+
+YEARS = [2001, 2002, 2003, 2004, 2005, 2006, 2007, 2008, 2009, 2010, 2011, 2012]
+
+
+def trend_series(refined_data, years=YEARS):
+    # sum Total for every Type x Year in one grouped pass
+    # returns the types (in order of first appearance, like Series.unique) and a types x years array
+    types = refined_data['Type'].unique()
+    if len(types) == 0:
+        return [], np.zeros((0, len(years)))
+
+    totals = refined_data.groupby(['Type', 'Year'], sort=False, observed=True)['Total'].sum()
+    grid = totals.unstack('Year', fill_value=0).reindex(index=types, columns=years, fill_value=0)
+    return list(types), grid.to_numpy()
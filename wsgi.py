@@ -0,0 +1,72 @@
+import argparse
+import gc
+import os
+
+# production entry point, the dev server in dashboard.py is single process with debug reloading
+#   gunicorn --preload -w 4 --threads 4 -b 0.0.0.0:8050 wsgi:application
+#   python wsgi.py --workers 4 --threads 4
+# the datasets, indexes and caches are built once in the parent process and shared copy-on-write by the workers
+
+
+def create_app():
+    # importing dashboard loads the data and registers the callbacks
+    import dashboard
+
+    # move everything loaded so far out of the garbage collector's reach, otherwise every collection
+    # in a worker touches these objects and copies their pages
+    gc.freeze()
+    return dashboard.server
+
+
+def serve_gunicorn(app, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+
+        def load_config(self):
+            self.cfg.set('bind', '{}:{}'.format(host, port))
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            return app
+
+    Application().run()
+
+
+def serve_waitress(app, host, port, threads):
+    # waitress has no worker processes, only threads (it also runs on windows)
+    from waitress import serve
+
+    serve(app, host=host, port=port, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the dashboard with a production wsgi server.')
+    parser.add_argument('--host', default=os.environ.get('DASHBOARD_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DASHBOARD_PORT', 8050)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('DASHBOARD_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('DASHBOARD_THREADS', 4)))
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'], default=os.environ.get('DASHBOARD_SERVER'))
+    args = parser.parse_args()
+
+    server = args.server
+    if server is None:
+        try:
+            import gunicorn  # noqa: F401
+            server = 'gunicorn'
+        except ImportError:
+            server = 'waitress'
+
+    app = create_app()
+    if server == 'gunicorn':
+        serve_gunicorn(app, args.host, args.port, args.workers, args.threads)
+    else:
+        serve_waitress(app, args.host, args.port, args.threads)
+
+
+if __name__ == '__main__':
+    main()
+else:
+    application = create_app()